@@ -1,3 +1,5 @@
+import os
+
 ALL_MODELS: dict[str, list[str]] = {
     "cigarette_detector": ["cigarette"],
     "nude_detector": [
@@ -26,3 +28,113 @@ ALL_MODELS: dict[str, list[str]] = {
     ],
     "bad_words_detector": ["bad_words"]
 }
+
+# Maximum number of decoded frames held in memory between the decoder and the censoring loop
+VIDEO_FRAME_BUFFER_SIZE: int = 32
+
+# Number of keyframes sent to the detectors in one batch. Frames between the batched keyframes
+# are held in memory until the detections arrive, so memory grows with batch size * keyframe interval.
+VIDEO_KEYFRAME_BATCH_SIZE: int = 4
+# A batch is sent early once this many frames are waiting, which bounds the memory on static content
+# where keyframes are far apart
+VIDEO_MAX_WINDOW_FRAMES: int = 64
+
+# libx264 settings of the output encoder: a slower preset or a lower CRF gives better quality for more CPU time
+VIDEO_ENCODER_PRESET: str = "veryfast"
+VIDEO_ENCODER_CRF: int = 23
+
+# Number of API jobs processed at the same time. Workers share the loaded detectors
+API_WORKERS: int = int(os.getenv("API_WORKERS", "2"))
+# Number of finished jobs whose status is kept for polling
+API_JOB_HISTORY_SIZE: int = int(os.getenv("API_JOB_HISTORY_SIZE", "1000"))
+# Print the time spent in every stage when a job finishes
+API_LOG_JOB_TIMINGS: bool = os.getenv("API_LOG_JOB_TIMINGS", "false").lower() == "true"
+# /process/batch: maximal number of keys per request, images per detector call (also the number
+# of images per chunk; at most three chunks are in memory) and number of threads that download,
+# encode and upload the images
+API_BATCH_MAX_ITEMS: int = int(os.getenv("API_BATCH_MAX_ITEMS", "1000"))
+API_BATCH_SIZE: int = int(os.getenv("API_BATCH_SIZE", "16"))
+API_BATCH_IO_WORKERS: int = int(os.getenv("API_BATCH_IO_WORKERS", "16"))
+
+# Number of files the CLI censors at the same time in bulk mode (directory, glob or manifest input)
+BULK_WORKERS: int = int(os.getenv("BULK_WORKERS", "2"))
+# Results manifest of a bulk run, relative to the current directory
+BULK_RESULTS_FILE: str = "censor_results.jsonl"
+
+# Number of processes that censor a video in parallel, split into segments at keyframes; 1 disables splitting
+VIDEO_SEGMENT_WORKERS: int = int(os.getenv("VIDEO_SEGMENT_WORKERS", "1"))
+# Target segment length in seconds, segments are cut at the first keyframe after this length
+VIDEO_SEGMENT_SECONDS: int = int(os.getenv("VIDEO_SEGMENT_SECONDS", "10"))
+
+# Tracker that follows censored boxes between keyframes: "optical_flow" (fast) or "csrt" (slow, OpenCV CSRT)
+TRACKER_BACKEND: str = os.getenv("TRACKER_BACKEND", "optical_flow")
+# Frames are downscaled so that their longest side is at most this size before optical flow tracking
+TRACKER_FLOW_MAX_SIDE: int = 640
+
+# Adaptive keyframe scheduling: detectors run at least every KEYFRAME_MAX_INTERVAL_S seconds on static
+# content, at most every KEYFRAME_MIN_INTERVAL_S seconds on fast motion, and on every scene cut
+KEYFRAME_MIN_INTERVAL_S: float = 0.1
+KEYFRAME_MAX_INTERVAL_S: float = 2.0
+# Histogram distance (Bhattacharyya, 0..1) between consecutive frames that counts as a scene cut
+SCENE_CUT_THRESHOLD: float = 0.5
+# Mean absolute difference of consecutive downscaled gray frames (0..255) below which content is static
+# and above which it is fast motion
+STATIC_MOTION_THRESHOLD: float = 1.5
+HIGH_MOTION_THRESHOLD: float = 12.0
+
+# Content-addressed cache of detections and transcripts, keyed by media content and model identity
+DETECTION_CACHE_ENABLED: bool = os.getenv("DETECTION_CACHE_ENABLED", "true").lower() == "true"
+DETECTION_CACHE_DIR: str = os.getenv("DETECTION_CACHE_DIR", "cache")
+DETECTION_CACHE_MEMORY_ITEMS: int = 4096  # entries kept in the in-process LRU tier
+DETECTION_CACHE_DISK_BYTES: int = int(os.getenv("DETECTION_CACHE_DISK_BYTES", str(1024 ** 3)))
+
+# How profanity is found in transcripts: "hybrid" - offline lexicon, the LLM only for words it can't decide;
+# "offline" - lexicon only, no network; "llm" - every word goes to GigaChat
+PROFANITY_MODE: str = os.getenv("PROFANITY_MODE", "hybrid")
+
+# LLM profanity classification: unique word forms are sent in chunks of this size, concurrently,
+# each request limited by the timeout; verdicts are remembered in a file between runs
+PROFANITY_LLM_CHUNK_SIZE: int = 100
+PROFANITY_LLM_WORKERS: int = 4
+PROFANITY_LLM_TIMEOUT_S: float = 30.0
+PROFANITY_VERDICT_CACHE: str = os.path.join(DETECTION_CACHE_DIR, "profanity_verdicts.json")
+
+# Vosk transcription: long audio is cut at the quietest point near every VOSK_CHUNK_SECONDS
+# (searched within the last VOSK_SILENCE_SEARCH_SECONDS of the chunk), and the chunks are
+# transcribed in parallel by a pool of recognizers sharing one model
+VOSK_POOL_SIZE: int = int(os.getenv("VOSK_POOL_SIZE", str(min(os.cpu_count() or 1, 4))))
+VOSK_CHUNK_SECONDS: float = 30.0
+VOSK_SILENCE_SEARCH_SECONDS: float = 5.0
+
+# Detectors are created on first use. A detector unused for PLUGIN_IDLE_TIMEOUT_S seconds is unloaded,
+# and the least recently used ones are unloaded while the model files of the loaded detectors take more
+# than PLUGIN_MEMORY_BUDGET_MB; 0 disables either limit
+PLUGIN_IDLE_TIMEOUT_S: float = float(os.getenv("PLUGIN_IDLE_TIMEOUT_S", "0"))
+PLUGIN_MEMORY_BUDGET_MB: int = int(os.getenv("PLUGIN_MEMORY_BUDGET_MB", "0"))
+# Detectors used within the last PLUGIN_EVICTION_GRACE_S seconds are never unloaded for the budget,
+# so the models of a running request don't evict each other
+PLUGIN_EVICTION_GRACE_S: float = float(os.getenv("PLUGIN_EVICTION_GRACE_S", "60"))
+
+# Backend of the YOLO detectors: "torch" - ultralytics eager inference on the .pt weights;
+# "onnx" - ONNX Runtime on CPU, the models are exported once into ONNX_CACHE_DIR;
+# "onnx_int8" - the same with static INT8 quantization calibrated on images from ONNX_CALIBRATION_DIR
+YOLO_BACKEND: str = os.getenv("YOLO_BACKEND", "torch")
+ONNX_CACHE_DIR: str = os.getenv("ONNX_CACHE_DIR", "models/onnx")
+ONNX_INTRA_OP_THREADS: int = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))  # 0 lets ONNX Runtime decide
+ONNX_INTER_OP_THREADS: int = int(os.getenv("ONNX_INTER_OP_THREADS", "0"))
+ONNX_CALIBRATION_DIR: str = os.getenv("ONNX_CALIBRATION_DIR", "calibration")
+ONNX_CALIBRATION_IMAGES: int = 100
+
+# Latency/accuracy tier of the detectors, can be set per request: "fast" - smaller input;
+# "balanced" - input of the model's size; "accurate" - additionally slices images with a side of at
+# least TILE_MIN_SIDE into overlapping TILE_SIZE tiles. All tiers letterbox same-shaped frames
+# to a rectangle instead of a square
+INFERENCE_TIER: str = os.getenv("INFERENCE_TIER", "balanced")
+TILE_MIN_SIDE: int = 1920
+TILE_SIZE: int = 1280
+TILE_OVERLAP: float = 0.2
+TILE_NMS_IOU: float = 0.5
+
+# Videos are decoded straight from a presigned MinIO URL instead of being downloaded first.
+# The transfer settings live in utils/minio_manager.py, which is shared with the frontend
+MINIO_STREAM_INPUT: bool = os.getenv("MINIO_STREAM_INPUT", "true").lower() == "true"
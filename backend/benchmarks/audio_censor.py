@@ -0,0 +1,83 @@
+"""
+Benchmark of audio censoring on a long file with hundreds of profanities.
+
+"concat" is the previous approach (the output assembled with repeated AudioSegment +=),
+"samples" is utils.censor_audio, which overwrites the ranges in one sample array.
+Both include the final wav export.
+
+Run from the backend directory:
+    python -m benchmarks.audio_censor --minutes 10 --words 100 500
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.generators import Sine, WhiteNoise
+
+from utils import censor_audio
+
+CENSOR_SOUND = "models/censor_sound.mp3"
+
+
+def random_timestamps(count: int, seconds: float, rng: np.random.Generator) -> List[dict]:
+    starts = np.sort(rng.uniform(0, seconds - 1, count))
+    return [{"word": "word", "start": float(start), "end": float(start + rng.uniform(0.2, 0.6))} for start in starts]
+
+
+def censor_concat(audio: AudioSegment, timestamps: List[dict], censor_sound: AudioSegment) -> AudioSegment:
+    censored_audio = AudioSegment.empty()
+    last_position = 0
+    for item in timestamps:
+        start_ms = item["start"] * 1000
+        end_ms = item["end"] * 1000
+        duration = end_ms - start_ms
+        censored_audio += audio[last_position:start_ms]
+        censored_audio += (censor_sound * math.ceil(duration / len(censor_sound)))[:duration]
+        last_position = end_ms
+    censored_audio += audio[last_position:]
+    return censored_audio
+
+
+def run(minutes: float, word_counts: List[int]) -> List[dict]:
+    rng = np.random.default_rng(0)
+    audio = WhiteNoise(sample_rate=44100).to_audio_segment(duration=minutes * 60 * 1000, volume=-20)
+    audio = audio.set_channels(2).set_sample_width(2)
+    if os.path.exists(CENSOR_SOUND):
+        beep = AudioSegment.from_file(CENSOR_SOUND)
+    else:
+        beep = Sine(1000, sample_rate=44100).to_audio_segment(duration=1000, volume=-10)
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = os.path.join(tmp_dir, "out.wav")
+        for count in word_counts:
+            timestamps = random_timestamps(count, minutes * 60, rng)
+            cases = {
+                "concat": lambda: censor_concat(
+                    audio, timestamps,
+                    beep.set_sample_width(audio.sample_width).set_frame_rate(audio.frame_rate).set_channels(
+                        audio.channels),
+                ),
+                "samples": lambda: censor_audio(audio, timestamps, CENSOR_SOUND),
+            }
+            for name, fn in cases.items():
+                start = time.perf_counter()
+                fn().export(output, format="wav")
+                seconds = time.perf_counter() - start
+                report.append({"minutes": minutes, "words": count, "method": name, "seconds": round(seconds, 3)})
+                print(f"{count:>5} words {name:>8}: {seconds:8.3f} s")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--words", type=int, nargs="+", default=[100, 500])
+    args = parser.parse_args()
+    print(json.dumps(run(args.minutes, args.words), indent=2))
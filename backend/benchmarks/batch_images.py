@@ -0,0 +1,66 @@
+"""
+Throughput of censoring many images one request at a time vs. as one batch.
+
+The per-request path runs the detectors once per image and renders and encodes the images
+one after another; the batch path of /process/batch sends the images to every detector in
+batches and renders and encodes them in a thread pool. MinIO is left out, both paths read
+the same decoded images. The detection cache is disabled.
+
+Run from the backend directory:
+    python -m benchmarks.batch_images --images 256 --batch-size 16
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["DETECTION_CACHE_ENABLED"] = "false"
+
+import cv2
+
+from .synthetic import make_image
+
+YOLO_MODELS = ["cigarette_detector", "nude_detector", "extremism_detector"]
+RESOLUTIONS = [(640, 480), (1280, 720), (1080, 1080), (800, 1200)]
+
+
+def measure(count: int, batch_size: int, workers: int) -> dict:
+    from main_file_processor import select_models
+    from processing import censor_image, detect_images, model
+
+    models, black_list = select_models([])
+    models = [m for m in models if m in YOLO_MODELS]
+    images = [make_image(*RESOLUTIONS[i % len(RESOLUTIONS)], seed=i) for i in range(count)]
+
+    def render(image, detections):
+        censored = censor_image(image.copy(), detections, black_list, "pixelate")
+        return cv2.imencode(".jpg", censored)[1]
+
+    def per_request():
+        for image in images:
+            render(image, model(image, models))
+
+    def batched():
+        detections = detect_images(images, [models] * count, [None] * count, batch_size)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(render, images, detections))
+
+    report = {"images": count, "batch_size": batch_size}
+    for name, fn in (("per_request", per_request), ("batch", batched)):
+        model(images[0], models)  # warm-up
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+        report[name] = {"seconds": round(seconds, 3), "images_per_s": round(count / seconds, 2)}
+    report["speedup"] = round(report["batch"]["images_per_s"] / report["per_request"]["images_per_s"], 2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.images, args.batch_size, args.workers), indent=2))
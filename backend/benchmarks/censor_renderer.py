@@ -0,0 +1,57 @@
+"""
+Microbenchmark of the censor renderer on a 4K frame.
+
+"per_box" is the previous approach (utils.pixelation_box called for every box),
+the other rows are utils.render_censor with every style.
+
+Run from the backend directory:
+    python -m benchmarks.censor_renderer --boxes 1 10 50
+"""
+import argparse
+import json
+import time
+from typing import List
+
+import numpy as np
+
+from utils import pixelation_box, render_censor
+
+WIDTH, HEIGHT = 3840, 2160
+
+
+def random_boxes(count: int, rng: np.random.Generator) -> np.ndarray:
+    sizes = rng.integers(40, 400, (count, 2))
+    origins = rng.integers(0, [WIDTH - 400, HEIGHT - 400], (count, 2))
+    return np.hstack([origins, origins + sizes])
+
+
+def run(box_counts: List[int], repeat: int) -> List[dict]:
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    report = []
+    for count in box_counts:
+        boxes = random_boxes(count, rng)
+        labels = ["cigarette"] * count
+        cases = {
+            "per_box": lambda img: [pixelation_box(img, *box) for box in boxes.tolist()],
+            "pixelate": lambda img: render_censor(img, boxes, labels, "pixelate"),
+            "blur": lambda img: render_censor(img, boxes, labels, "blur"),
+            "fill": lambda img: render_censor(img, boxes, labels, "fill"),
+        }
+        for name, fn in cases.items():
+            img = frame.copy()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn(img)
+            ms = (time.perf_counter() - start) / repeat * 1000
+            report.append({"boxes": count, "renderer": name, "ms_per_frame": round(ms, 3)})
+            print(f"{count:>3} boxes {name:>9}: {ms:8.3f} ms")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boxes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.boxes, args.repeat), indent=2))
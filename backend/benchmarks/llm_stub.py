@@ -0,0 +1,31 @@
+"""
+Offline stand-in for the GigaChat client of BadWordsDetector.
+"""
+import json
+import re
+import time
+from typing import Any, List, NamedTuple
+
+
+class StubResponse(NamedTuple):
+    content: str
+
+
+class StubChat:
+    """
+    Answers profanity prompts locally: the words of the prompt that start with one of `profane_stems`
+    are reported as profane, after an optional fixed delay that imitates a network round trip.
+    """
+
+    def __init__(self, profane_stems: tuple = ("бля", "хуй", "пизд", "еба"), delay: float = 0.0):
+        self.profane_stems = profane_stems
+        self.delay = delay
+        self.calls = 0
+
+    def invoke(self, messages: List[Any]) -> StubResponse:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        words = re.findall(r"^\s*(\S+)\s*$", messages[-1].content, re.MULTILINE)
+        profane = [word for word in words if word.lower().startswith(self.profane_stems)]
+        return StubResponse(json.dumps({"profanity": profane}, ensure_ascii=False))
@@ -0,0 +1,82 @@
+"""
+Cost of the MinIO metadata operations on a bucket with many objects.
+
+Fills a scratch bucket with tiny objects, then compares the old and the current way of
+checking that an object exists (listing the bucket vs. one stat_object), of making sure the
+bucket exists before an upload (bucket_exists every time vs. the cached check) and of
+clearing the bucket (remove_object per object vs. batched remove_objects).
+The bucket is emptied at the end. Uses MINIO_ENDPOINT and the keys from the environment.
+
+Run from the backend directory:
+    python -m benchmarks.minio_client --objects 100000
+"""
+import argparse
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.minio_manager import MinIOClient, minio_client
+
+
+def _populate(client: MinIOClient, bucket: str, count: int, workers: int) -> float:
+    client.ensure_bucket(bucket)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(
+            lambda i: client.client.put_object(bucket, f"objects/{i:08d}", io.BytesIO(b"x"), 1),
+            range(count),
+        ))
+    return time.perf_counter() - start
+
+
+def _per_call(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def measure(bucket: str, objects: int, repeats: int, remove_sample: int, workers: int) -> dict:
+    client = minio_client
+    report = {"objects": objects, "populate_s": round(_populate(client, bucket, objects, workers), 3)}
+    target = f"objects/{objects - 1:08d}"
+
+    # The old file_exists listed the whole bucket, so it only needs a couple of runs to show
+    list_s = _per_call(
+        lambda: any(obj.object_name == target for obj in client.client.list_objects(bucket, recursive=True)), 2
+    )
+    stat_s = _per_call(lambda: client.file_exists(bucket, target), repeats)
+    report["exists"] = {"list_ms": round(list_s * 1000, 3), "stat_ms": round(stat_s * 1000, 3)}
+
+    bucket_exists_s = _per_call(lambda: client.client.bucket_exists(bucket), repeats)
+    cached_s = _per_call(lambda: client.ensure_bucket(bucket), repeats)
+    report["bucket_check"] = {
+        "bucket_exists_ms": round(bucket_exists_s * 1000, 3), "cached_ms": round(cached_s * 1000, 6)
+    }
+
+    # Removing every object one by one would take too long, so it is measured on a sample
+    sample = min(remove_sample, objects)
+    start = time.perf_counter()
+    for i in range(sample):
+        client.client.remove_object(bucket, f"objects/{i:08d}")
+    one_by_one_s = time.perf_counter() - start
+    start = time.perf_counter()
+    client.clear(bucket)
+    batched_s = time.perf_counter() - start
+    report["clear"] = {
+        "remove_object_per_s": round(sample / one_by_one_s, 1) if sample else None,
+        "remove_objects_per_s": round((objects - sample) / batched_s, 1) if objects > sample else None,
+    }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bucket", default="benchmark-minio-client")
+    parser.add_argument("--objects", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--remove-sample", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.bucket, args.objects, args.repeats, args.remove_sample, args.workers), indent=2))
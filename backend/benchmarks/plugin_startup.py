@@ -0,0 +1,56 @@
+"""
+Startup time and peak memory of a run that needs only some of the detectors.
+
+Every case runs in a fresh process: import plugins_system, get the requested detectors
+and, with --all, warm up the rest as a server does.
+
+Run from the backend directory:
+    python -m benchmarks.plugin_startup --plugins cigarette_detector
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import time
+from typing import List
+
+
+def _run(plugin_names: List[str], warm_up: bool, result: multiprocessing.Queue) -> None:
+    start = time.perf_counter()
+    from plugins_system import default_plugin_manager
+
+    imported = time.perf_counter()
+    if warm_up:
+        default_plugin_manager.warm_up()
+    else:
+        for name in plugin_names:
+            default_plugin_manager.get_detector(name)
+    loaded = time.perf_counter()
+    # ru_maxrss is reported in kilobytes on Linux
+    result.put({
+        "import_s": round(imported - start, 3),
+        "load_s": round(loaded - imported, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "loaded_plugins": default_plugin_manager.loaded_plugins(),
+    })
+
+
+def measure(plugin_names: List[str]) -> List[dict]:
+    ctx = multiprocessing.get_context("spawn")
+    report = []
+    for case, warm_up in (("requested", False), ("all", True)):
+        result = ctx.Queue()
+        proc = ctx.Process(target=_run, args=(plugin_names, warm_up, result))
+        proc.start()
+        row = {"case": case, **result.get()}
+        proc.join()
+        report.append(row)
+        print(f"{case:>9}: import {row['import_s']}s, load {row['load_s']}s, peak RSS {row['peak_rss_mb']} MB")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--plugins", nargs="+", default=["cigarette_detector"])
+    args = parser.parse_args()
+    print(json.dumps(measure(args.plugins), indent=2))
@@ -0,0 +1,72 @@
+"""
+Per-keyframe cost of preprocessing with and without the shared preprocessing stage.
+
+"separate" lets every YOLO detector letterbox and tensorize the raw frame itself,
+"shared" prepares the tensor once in processing.model_batch and hands it to all of them.
+
+Run from the backend directory:
+    python -m benchmarks.preprocessing --resolution 1920x1080 --keyframes 32
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+YOLO_MODELS = ["cigarette_detector", "nude_detector", "extremism_detector"]
+
+
+def _timeit(fn, repeat: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(width: int, height: int, keyframes: int, batch_size: int, repeat: int) -> dict:
+    from plugins_system import default_plugin_manager
+    from plugins_system.detectors.base_detector import IMAGE_SIZE
+    from processing import model_batch
+    from processing.preprocessing import prepare_batch
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(keyframes)]
+    batches = [frames[i:i + batch_size] for i in range(0, keyframes, batch_size)]
+    detectors = [default_plugin_manager.get_detector(name) for name in YOLO_MODELS]
+
+    def separate():
+        for batch in batches:
+            for detector in detectors:
+                detector.detect_batch(batch)
+
+    def shared():
+        for batch in batches:
+            model_batch(batch, YOLO_MODELS)
+
+    def preprocess_only():
+        for batch in batches:
+            prepare_batch(batch, IMAGE_SIZE)
+
+    separate_s = _timeit(separate, repeat) / keyframes
+    shared_s = _timeit(shared, repeat) / keyframes
+    preprocess_s = _timeit(preprocess_only, repeat) / keyframes
+    return {
+        "resolution": f"{width}x{height}",
+        "detectors": len(detectors),
+        "separate_ms_per_keyframe": round(separate_s * 1000, 2),
+        "shared_ms_per_keyframe": round(shared_s * 1000, 2),
+        "preprocess_ms_per_keyframe": round(preprocess_s * 1000, 2),
+        "saving_ms_per_keyframe": round((separate_s - shared_s) * 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resolution", default="1920x1080")
+    parser.add_argument("--keyframes", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    w, h = map(int, args.resolution.lower().split("x"))
+    print(json.dumps(run(w, h, args.keyframes, args.batch_size, args.repeat), indent=2))
@@ -0,0 +1,331 @@
+"""
+End-to-end and per-stage benchmark of the image, video, audio and file pipelines on synthetic media.
+
+Every scenario runs in a fresh process with the detection cache disabled, so repeated runs are not
+served from the cache. Peak RSS is reported once per scenario, in a row with the stage "scenario":
+its stages share the process, so the peak can't be attributed to one of them. GigaChat is replaced
+by benchmarks.llm_stub.StubChat, so the suite runs offline.
+
+Run from the backend directory:
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --tolerance 0.1
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .llm_stub import StubChat
+from .synthetic import make_clip, make_image, make_speech
+
+YOLO_MODELS = ["cigarette_detector", "nude_detector", "extremism_detector"]
+
+# Metrics where a larger value is better; for all other metrics a smaller value is better
+HIGHER_IS_BETTER = ("fps", "items_per_s", "realtime_factor")
+
+
+def latency_stats(samples: Iterable[float]) -> Dict[str, float]:
+    """
+    :param samples: Durations in seconds.
+    :return: Mean and percentiles in milliseconds and the throughput in items per second.
+    """
+    ms = np.asarray(list(samples)) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "items_per_s": round(float(1000 / ms.mean()), 3) if ms.mean() > 0 else 0.0,
+    }
+
+
+def _repeat(fn: Callable[[], object], repeat: int) -> List[float]:
+    fn()  # warm-up
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _use_llm_stub() -> None:
+    from plugins_system import BadWordsDetector, default_plugin_manager
+
+    default_plugin_manager.set_detector("bad_words_detector", BadWordsDetector(llm_client=StubChat()))
+
+
+def bench_image(tmp_dir: str, resolutions: List[Tuple[int, int]], repeat: int) -> List[dict]:
+    import cv2
+    from plugins_system import default_plugin_manager
+    from plugins_system.detectors.base_detector import IMAGE_SIZE
+    from processing import process_image
+    from processing.preprocessing import prepare_batch
+    from utils import render_censor
+
+    black_list = ["cigarette"]
+    rows = []
+    for width, height in resolutions:
+        case = f"{width}x{height}"
+        image = make_image(width, height)
+        path = os.path.join(tmp_dir, f"image_{case}.jpg")
+        cv2.imwrite(path, image)
+        boxes = [(x, x, x + 200, x + 200) for x in range(0, min(width, height) - 200, max(min(width, height) // 5, 1))]
+
+        tensor = prepare_batch([image], IMAGE_SIZE, rect=True).tensor
+        stages = {
+            "decode": lambda: cv2.imread(path),
+            "preprocess": lambda: prepare_batch([image], IMAGE_SIZE, rect=True),
+            **{
+                f"infer:{name}": (lambda detector: lambda: detector.detect_batch(tensor))(
+                    default_plugin_manager.get_detector(name))
+                for name in YOLO_MODELS
+            },
+            "render": lambda: render_censor(image.copy(), boxes, black_list * len(boxes), "pixelate"),
+            "encode": lambda: cv2.imencode(".jpg", image),
+            "end_to_end": lambda: process_image(path, black_list, YOLO_MODELS, True),
+        }
+        for stage, fn in stages.items():
+            rows.append({"scenario": "image", "case": case, "stage": stage, **latency_stats(_repeat(fn, repeat))})
+    return rows
+
+
+def bench_video(tmp_dir: str, cases: List[Tuple[int, int, int, int, int]], repeat: int) -> List[dict]:
+    import cv2
+    from processing import process_video
+    from processing.video_processor import read_frames
+    from utils import write_video
+
+    rows = []
+    for width, height, fps, seconds, boxes in cases:
+        case = f"{width}x{height}@{fps}fps_{seconds}s_{boxes}boxes"
+        path = os.path.join(tmp_dir, f"clip_{case}.mp4")
+        make_clip(path, seconds, fps, width, height, boxes)
+        output_path = os.path.join(tmp_dir, "out.mp4")
+        frames_count = seconds * fps
+
+        def decode():
+            for _ in read_frames(cv2.VideoCapture(path)):
+                pass
+
+        def encode():
+            frame = np.full((height, width, 3), 40, dtype=np.uint8)
+            write_video((frame for _ in range(frames_count)), output_path, fps)
+
+        frame_latencies = []
+
+        def end_to_end():
+            frame_latencies.clear()
+            frames, video_fps = process_video(path, [], YOLO_MODELS, True)
+
+            def timed():
+                last = time.perf_counter()
+                for frame in frames:
+                    now = time.perf_counter()
+                    frame_latencies.append(now - last)
+                    last = now
+                    yield frame
+
+            write_video(timed(), output_path, video_fps)
+
+        for stage, fn in (("decode", decode), ("encode", encode), ("end_to_end", end_to_end)):
+            durations = _repeat(fn, repeat)
+            mean_s = float(np.mean(durations))
+            row = {
+                "scenario": "video", "case": case, "stage": stage,
+                "fps": round(frames_count / mean_s, 2),
+                "realtime_factor": round(seconds / mean_s, 3),
+                **latency_stats(durations),
+            }
+            if stage == "end_to_end":
+                row["frame_p99_ms"] = round(float(np.percentile(frame_latencies, 99)) * 1000, 3)
+            rows.append(row)
+    return rows
+
+
+def bench_audio(tmp_dir: str, durations: List[int], repeat: int) -> List[dict]:
+    from pydub import AudioSegment
+    from plugins_system.speech import RecognizerPool, transcribe
+    from processing import process_audio
+    from utils import censor_audio, iter_pcm_chunks
+    from vosk import Model
+
+    _use_llm_stub()
+    pool = RecognizerPool(Model("models/vosk-model-small-ru-0.22"), 16000)
+    rows = []
+    for seconds in durations:
+        case = f"{seconds}s"
+        path = os.path.join(tmp_dir, f"speech_{case}.wav")
+        make_speech(path, seconds)
+        audio = AudioSegment.from_file(path)
+        timestamps = [{"word": "word", "start": s, "end": s + 0.3} for s in np.arange(0.5, seconds - 1, 2.0)]
+
+        stages = {
+            "decode": lambda: sum(1 for _ in iter_pcm_chunks(path)),
+            "transcribe": lambda: transcribe(iter_pcm_chunks(path), pool),
+            "censor": lambda: censor_audio(audio, timestamps, "models/censor_sound.mp3"),
+            "end_to_end": lambda: process_audio(path),
+        }
+        for stage, fn in stages.items():
+            durations_s = _repeat(fn, repeat)
+            rows.append({
+                "scenario": "audio", "case": case, "stage": stage,
+                "realtime_factor": round(seconds / float(np.mean(durations_s)), 3),
+                **latency_stats(durations_s),
+            })
+    return rows
+
+
+def bench_file(tmp_dir: str, repeat: int) -> List[dict]:
+    import cv2
+    from main_file_processor import process_file
+    from utils import mux_audio_video
+
+    _use_llm_stub()
+    image_path = os.path.join(tmp_dir, "file_image.jpg")
+    cv2.imwrite(image_path, make_image(1920, 1080))
+    audio_path = os.path.join(tmp_dir, "file_audio.wav")
+    make_speech(audio_path, 10)
+    clip_path = os.path.join(tmp_dir, "file_clip_silent.mp4")
+    make_clip(clip_path, 10, 30, 1280, 720, 3)
+    video_path = os.path.join(tmp_dir, "file_clip.mp4")
+    mux_audio_video(clip_path, audio_path, video_path)
+
+    rows = []
+    for case, path in (("image", image_path), ("audio", audio_path), ("video", video_path)):
+        durations = _repeat(lambda: process_file(path, []), repeat)
+        rows.append({"scenario": "file", "case": case, "stage": "end_to_end", **latency_stats(durations)})
+    return rows
+
+
+SCENARIOS = {
+    "image": bench_image,
+    "video": bench_video,
+    "audio": bench_audio,
+    "file": bench_file,
+}
+
+
+def _run_scenario(name: str, kwargs: dict, result: multiprocessing.Queue) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["DETECTION_CACHE_ENABLED"] = "false"
+        os.environ["DETECTION_CACHE_DIR"] = os.path.join(tmp_dir, "cache")
+        try:
+            rows = SCENARIOS[name](tmp_dir, **kwargs)
+        except Exception as e:
+            result.put(e)
+            return
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    result.put(rows + [{"scenario": name, "case": "all", "stage": "scenario", "peak_rss_mb": peak_mb}])
+
+
+def run(scenarios: Dict[str, dict]) -> List[dict]:
+    ctx = multiprocessing.get_context("spawn")
+    report = []
+    for name, kwargs in scenarios.items():
+        result = ctx.Queue()
+        proc = ctx.Process(target=_run_scenario, args=(name, kwargs, result))
+        proc.start()
+        rows = result.get()
+        proc.join()
+        if isinstance(rows, Exception):
+            raise rows
+        for row in rows:
+            metric = f"p50 {row['p50_ms']:10.2f} ms" if "p50_ms" in row else f"peak RSS {row['peak_rss_mb']} MB"
+            print(f"{row['scenario']:>6} {row['case']:>32} {row['stage']:>28}: {metric}")
+        report.extend(rows)
+    return report
+
+
+def compare(report: List[dict], baseline: List[dict], tolerance: float) -> List[dict]:
+    """
+    Compares every metric with the baseline.
+
+    :param report: Rows of the current run.
+    :param baseline: Rows of the stored run.
+    :param tolerance: Relative change in the bad direction that counts as a regression.
+    :return: Changes of all metrics present in both runs, with a regression flag.
+    """
+    def key(row: dict) -> Tuple[str, str, str]:
+        return row["scenario"], row["case"], row["stage"]
+
+    baseline_rows = {key(row): row for row in baseline}
+    changes = []
+    for row in report:
+        old = baseline_rows.get(key(row))
+        if old is None:
+            continue
+        for metric, value in row.items():
+            if not isinstance(value, (int, float)) or not isinstance(old.get(metric), (int, float)) or not old[metric]:
+                continue
+            change = (value - old[metric]) / old[metric]
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            changes.append({
+                "scenario": row["scenario"], "case": row["case"], "stage": row["stage"], "metric": metric,
+                "baseline": old[metric], "current": value, "change": round(change, 4),
+                "regression": worse > tolerance,
+            })
+    return changes
+
+
+def _parse_resolution(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def _parse_video_case(value: str) -> Tuple[int, int, int, int, int]:
+    """
+    WIDTHxHEIGHT:FPS:SECONDS:BOXES, e.g. 1280x720:30:10:3
+    """
+    resolution, fps, seconds, boxes = value.split(":")
+    return (*_parse_resolution(resolution), int(fps), int(seconds), int(boxes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--resolutions", nargs="+", type=_parse_resolution,
+                        default=[(640, 480), (1920, 1080), (4000, 3000)])
+    parser.add_argument("--videos", nargs="+", type=_parse_video_case,
+                        default=[(1280, 720, 30, 10, 1), (1920, 1080, 30, 10, 10), (1280, 720, 60, 30, 3)])
+    parser.add_argument("--audio-seconds", nargs="+", type=int, default=[30, 300])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Compare with a report stored by --save-baseline")
+    parser.add_argument("--save-baseline", help="Store the report as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    scenario_kwargs = {
+        "image": {"resolutions": args.resolutions, "repeat": args.repeat},
+        "video": {"cases": args.videos, "repeat": max(args.repeat // 5, 1)},
+        "audio": {"durations": args.audio_seconds, "repeat": max(args.repeat // 5, 1)},
+        "file": {"repeat": max(args.repeat // 5, 1)},
+    }
+    report = run({name: scenario_kwargs[name] for name in args.scenarios})
+    output = {"report": report}
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            changes = compare(report, json.load(baseline_file)["report"], args.tolerance)
+        output["changes"] = changes
+        regressions = [change for change in changes if change["regression"]]
+        for change in regressions:
+            print(f"REGRESSION {change['scenario']}/{change['case']}/{change['stage']} {change['metric']}: "
+                  f"{change['baseline']} -> {change['current']} ({change['change']:+.1%})")
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as report_file:
+            json.dump(output if path == args.output else {"report": report}, report_file, indent=2)
+
+    print(json.dumps(output, indent=2))
+    if args.baseline and any(change["regression"] for change in output["changes"]):
+        sys.exit(1)
@@ -0,0 +1,98 @@
+"""
+Synthetic media for the benchmarks: images, clips with moving boxes and speech-like audio.
+
+Everything is generated from a fixed seed, so repeated runs process the same data.
+"""
+import wave
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+
+def _box_positions(count: int, width: int, height: int, size: int, step: int) -> np.ndarray:
+    rng = np.random.default_rng(count)
+    origins = rng.integers(0, [max(width - size, 1), max(height - size, 1)], (count, 2))
+    velocities = rng.integers(-step, step + 1, (count, 2))
+    return np.stack([origins, velocities], axis=1)
+
+
+def make_image(width: int, height: int, boxes: int = 5, seed: int = 0) -> np.ndarray:
+    """
+    A noisy background with filled rectangles of random colors.
+
+    :param width, height: Image size.
+    :param boxes: Number of rectangles.
+    :param seed: Random seed.
+    :return: BGR image.
+    """
+    rng = np.random.default_rng(seed)
+    image = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    size = max(min(width, height) // 8, 8)
+    for x, y in rng.integers(0, [max(width - size, 1), max(height - size, 1)], (boxes, 2)):
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(image, (int(x), int(y)), (int(x) + size, int(y) + size), color, -1)
+    return image
+
+
+def make_clip(path: str, seconds: int, fps: int = 30, width: int = 1280, height: int = 720, boxes: int = 1) -> None:
+    """
+    Write a synthetic clip with moving squares.
+
+    :param path: Output path.
+    :param seconds: Clip length in seconds.
+    :param fps: FPS of the clip.
+    :param width, height: Frame size.
+    :param boxes: Number of moving squares.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    size = 100
+    positions = _box_positions(boxes, width, height, size, 7)
+    for i in range(seconds * fps):
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        for (x0, y0), (dx, dy) in positions:
+            x = int(x0 + dx * i) % max(width - size, 1)
+            y = int(y0 + dy * i) % max(height - size, 1)
+            cv2.rectangle(frame, (x, y), (x + size, y + size), (0, 200, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def make_speech(path: str, seconds: float, sample_rate: int = 16000, seed: int = 0) -> Tuple[int, int]:
+    """
+    Write a mono wav with speech-like sound: voiced syllables of a varying pitch with formant-like
+    harmonics, separated by short pauses.
+
+    :param path: Output path.
+    :param seconds: Length of the audio.
+    :param sample_rate: Sample rate in Hz.
+    :param seed: Random seed.
+    :return: Number of syllables and of pauses longer than 0.3 s.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = np.zeros(total, dtype=np.float32)
+    position = syllables = pauses = 0
+    while position < total:
+        length = int(rng.uniform(0.12, 0.35) * sample_rate)
+        t = np.arange(min(length, total - position)) / sample_rate
+        pitch = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * 3 * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+        envelope = np.sin(np.pi * np.linspace(0, 1, len(t))) ** 2
+        audio[position:position + len(t)] = voice * envelope
+        position += len(t)
+        syllables += 1
+
+        pause = rng.uniform(0.02, 0.6)
+        pauses += pause > 0.3
+        position += int(pause * sample_rate)
+
+    audio += rng.normal(0, 0.01, total)
+    samples = (audio / max(np.abs(audio).max(), 1e-6) * 0.8 * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return syllables, pauses
@@ -0,0 +1,75 @@
+"""
+Per-frame cost and box drift of the tracker backends.
+
+Textured squares move across a noisy 1080p background with known trajectories; every backend
+tracks them from the first frame, and the drift is the mean distance between the tracked and
+the true box centers on the last frame.
+
+Run from the backend directory:
+    python -m benchmarks.trackers --boxes 1 10 50 --frames 15
+"""
+import argparse
+import json
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from processing.trackers import TRACKERS, create_tracker
+
+
+def make_sequence(boxes: int, frames: int, width: int = 1920, height: int = 1080, size: int = 80, seed: int = 0
+                  ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """
+    :return: Frames and the true (N, 4) boxes on every frame.
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+    textures = rng.integers(0, 255, (boxes, size, size, 3), dtype=np.uint8)
+    starts = rng.uniform([0, 0], [width - size * 3, height - size * 3], (boxes, 2))
+    velocities = rng.uniform(-4, 4, (boxes, 2))
+
+    sequence, truth = [], []
+    for t in range(frames):
+        frame = background.copy()
+        positions = np.round(starts + velocities * t + size).astype(int)
+        for texture, (x, y) in zip(textures, positions):
+            frame[y:y + size, x:x + size] = texture
+        sequence.append(frame)
+        truth.append(np.hstack([positions, positions + size]))
+    return sequence, truth
+
+
+def run(box_counts: List[int], frames: int) -> List[dict]:
+    report = []
+    for boxes in box_counts:
+        sequence, truth = make_sequence(boxes, frames)
+        for name in TRACKERS:
+            tracker = create_tracker(name)
+            tracker.init(sequence[0], [tuple(box) for box in truth[0]])
+
+            start = time.perf_counter()
+            for frame in sequence[1:]:
+                success, tracked = tracker.update(frame)
+            per_frame_ms = (time.perf_counter() - start) / (frames - 1) * 1000
+
+            tracked = np.array(tracked, dtype=np.float32).reshape(-1, 4)
+            centers = (tracked[:, :2] + tracked[:, 2:]) / 2
+            true_centers = (truth[-1][:, :2] + truth[-1][:, 2:]) / 2
+            drift = float(np.linalg.norm(centers - true_centers, axis=1).mean())
+            report.append({
+                "tracker": name,
+                "boxes": boxes,
+                "ms_per_frame": round(per_frame_ms, 2),
+                "mean_drift_px": round(drift, 2),
+            })
+            print(f"{name:>13} {boxes:>3} boxes: {per_frame_ms:7.2f} ms/frame, drift {drift:6.2f} px")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boxes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--frames", type=int, default=15)
+    args = parser.parse_args()
+    print(json.dumps(run(args.boxes, args.frames), indent=2))
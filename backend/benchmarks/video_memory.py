@@ -0,0 +1,55 @@
+"""
+Peak memory of the streaming video pipeline for clips of different length.
+
+Each clip is processed in a fresh process, so the reported peak RSS belongs to that run only.
+With streaming enabled the numbers should stay flat as the clip gets longer.
+
+Run from the backend directory:
+    python -m benchmarks.video_memory --durations 5 20 60
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+from typing import List
+
+from .synthetic import make_clip
+
+
+def _run(input_path: str, output_path: str, result: multiprocessing.Queue) -> None:
+    from main_file_processor import save_output
+    from processing import process_video
+
+    frames, fps = process_video(input_path, [], [], True)
+    save_output(frames, output_path, fps)
+    # ru_maxrss is reported in kilobytes on Linux
+    result.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def measure(durations: List[int]) -> List[dict]:
+    ctx = multiprocessing.get_context("spawn")
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for seconds in durations:
+            input_path = os.path.join(tmp, f"clip_{seconds}s.mp4")
+            make_clip(input_path, seconds)
+
+            result = ctx.Queue()
+            proc = ctx.Process(target=_run, args=(input_path, os.path.join(tmp, "out.mp4"), result))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0:
+                raise RuntimeError(f"Processing the {seconds}s clip failed with exit code {proc.exitcode}")
+            peak_mb = result.get()
+            report.append({"duration_s": seconds, "peak_rss_mb": round(peak_mb, 1)})
+            print(f"{seconds:>5}s clip: peak RSS {peak_mb:.1f} MB")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=int, nargs="+", default=[5, 20, 60])
+    args = parser.parse_args()
+    print(json.dumps(measure(args.durations), indent=2))
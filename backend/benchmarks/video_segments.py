@@ -0,0 +1,58 @@
+"""
+Speedup of segment-parallel video processing versus the number of worker processes.
+
+Run from the backend directory:
+    python -m benchmarks.video_segments --duration 60 --workers 1 2 4 8 16 32
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+from .video_memory import make_clip
+
+YOLO_MODELS = ["cigarette_detector", "nude_detector", "extremism_detector"]
+
+
+def run(duration: int, workers_list: List[int], segment_seconds: int) -> List[dict]:
+    from processing import process_video
+    from processing.segment_processor import process_video_segments
+    from utils import write_video
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "clip.mp4")
+        make_clip(input_path, duration)
+        output_path = os.path.join(tmp, "out.mp4")
+
+        start = time.perf_counter()
+        frames, fps = process_video(input_path, [], YOLO_MODELS, True)
+        write_video(frames, output_path, fps)
+        sequential_s = time.perf_counter() - start
+        print(f"sequential: {sequential_s:.1f}s")
+
+        for workers in workers_list:
+            start = time.perf_counter()
+            process_video_segments(
+                input_path, output_path, [], YOLO_MODELS, True, workers=workers, segment_seconds=segment_seconds
+            )
+            elapsed = time.perf_counter() - start
+            report.append({
+                "workers": workers,
+                "cpu_count": os.cpu_count(),
+                "seconds": round(elapsed, 2),
+                "speedup": round(sequential_s / elapsed, 2),
+            })
+            print(f"{workers:>3} workers: {elapsed:.1f}s, speedup x{sequential_s / elapsed:.2f}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--segment-seconds", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.duration, args.workers, args.segment_seconds), indent=2))
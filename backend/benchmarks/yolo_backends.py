@@ -0,0 +1,90 @@
+"""
+Accuracy and latency of the YOLO inference backends on a local sample set.
+
+Every detector is loaded with each backend and run over the same letterboxed batches;
+the PyTorch detections are the reference for the agreement of the other backends
+(a box agrees if a box of the same class overlaps it with IoU >= 0.5).
+
+Run from the backend directory:
+    python -m benchmarks.yolo_backends --images samples/ --backends torch onnx onnx_int8
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+YOLO_DETECTORS = ["cigarette_detector", "nude_detector", "extremism_detector"]
+
+
+def _iou(a, b) -> float:
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(x2 - x1, 0) * max(y2 - y1, 0)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def agreement(reference: List[List[dict]], candidate: List[List[dict]]) -> Dict[str, float]:
+    """
+    Precision and recall of `candidate` detections against `reference` detections.
+    """
+    matched_ref = matched_cand = total_ref = total_cand = 0
+    for ref, cand in zip(reference, candidate):
+        total_ref += len(ref)
+        total_cand += len(cand)
+        matched_ref += sum(any(r['class'] == c['class'] and _iou(r['box'], c['box']) >= 0.5 for c in cand) for r in ref)
+        matched_cand += sum(any(r['class'] == c['class'] and _iou(r['box'], c['box']) >= 0.5 for r in ref) for c in cand)
+    return {
+        "precision": round(matched_cand / total_cand, 3) if total_cand else 1.0,
+        "recall": round(matched_ref / total_ref, 3) if total_ref else 1.0,
+    }
+
+
+def load_images(images_dir: str, count: int) -> List[np.ndarray]:
+    paths = sorted(glob.glob(os.path.join(images_dir, "*.jpg")) + glob.glob(os.path.join(images_dir, "*.png")))
+    if paths:
+        return [cv2.imread(path) for path in paths[:count]]
+    print(f"No images in {images_dir}, using random frames: latency is meaningful, agreement is not")
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def run(images_dir: str, count: int, batch_size: int, backends: List[str]) -> List[dict]:
+    from plugins_system import default_plugin_manager
+    from plugins_system.detectors.base_detector import IMAGE_SIZE
+    from processing.preprocessing import prepare_batch
+
+    images = load_images(images_dir, count)
+    batches = [prepare_batch(images[i:i + batch_size], IMAGE_SIZE).tensor for i in range(0, len(images), batch_size)]
+
+    report = []
+    for name in YOLO_DETECTORS:
+        detector_class = type(default_plugin_manager.get_detector(name))
+        reference = None
+        for backend in backends:
+            detector = detector_class(backend=backend)
+            detector.detect_batch(batches[0])  # warm-up
+            start = time.perf_counter()
+            detections = [d for batch in batches for d in detector.detect_batch(batch)]
+            ms = (time.perf_counter() - start) / len(images) * 1000
+            if reference is None:
+                reference = detections
+            row = {"detector": name, "backend": backend, "ms_per_image": round(ms, 2), **agreement(reference, detections)}
+            report.append(row)
+            print(f"{name:>20} {backend:>10}: {ms:8.2f} ms/image, precision {row['precision']}, recall {row['recall']}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", default="samples")
+    parser.add_argument("--count", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx_int8"])
+    args = parser.parse_args()
+    print(json.dumps(run(args.images, args.count, args.batch_size, args.backends), indent=2))
@@ -0,0 +1,168 @@
+import glob
+import json
+import mimetypes
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from main_file_processor import process_file
+from utils import TempFilesManager
+
+MEDIA_TYPES = ("image", "video", "audio")
+MANIFEST_EXTENSIONS = (".txt", ".lst", ".list")
+
+
+def is_media(path: str) -> bool:
+    mime_type, _ = mimetypes.guess_type(path)
+    return mime_type is not None and mime_type.split("/")[0] in MEDIA_TYPES
+
+
+def is_bulk_source(source: str) -> bool:
+    """
+    Whether the CLI input is a directory, a glob pattern or a manifest (a text file with one of
+    MANIFEST_EXTENSIONS) instead of a single media file.
+    """
+    is_manifest = os.path.isfile(source) and os.path.splitext(source)[1].lower() in MANIFEST_EXTENSIONS
+    return os.path.isdir(source) or glob.has_magic(source) or is_manifest
+
+
+def collect_inputs(source: str) -> List[str]:
+    """
+    Media files of a bulk source.
+
+    :param source: A directory (searched recursively), a glob pattern (`**` matches subdirectories)
+                   or a manifest: a text file with one path per line, relative to the manifest;
+                   empty lines and lines starting with "#" are skipped.
+    :return: Absolute paths in a stable order, without the outputs of earlier runs.
+    :raises ValueError: If the manifest is not a UTF-8 text file.
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(root, name) for root, _, names in os.walk(source) for name in names]
+    elif glob.has_magic(source):
+        paths = glob.glob(source, recursive=True)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(source))
+        try:
+            with open(source, encoding="utf-8") as manifest:
+                lines = [line.strip() for line in manifest]
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Manifest {source} is not a UTF-8 text file: {e}") from e
+        paths = [os.path.join(base_dir, line) for line in lines if line and not line.startswith("#")]
+
+    paths = [os.path.abspath(path) for path in paths]
+    # Censored files are written next to their inputs and must not be picked up again
+    return sorted(
+        path for path in dict.fromkeys(paths)
+        if is_media(path) and not os.path.splitext(path)[0].endswith("_censor")
+    )
+
+
+def load_results(results_path: str) -> Dict[str, dict]:
+    """
+    Reads a results manifest written by `process_bulk`; the last record of a file wins.
+
+    :param results_path: Path to the JSON Lines manifest.
+    :return: Records by input path, empty if the manifest does not exist.
+    """
+    records = {}
+    if not os.path.exists(results_path):
+        return records
+    with open(results_path) as results_file:
+        for line in results_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            records[record["input"]] = record
+    return records
+
+
+def process_bulk(
+        inputs: List[str],
+        results_path: str,
+        black_list: List[str],
+        pixelation: bool = True,
+        style: Optional[str] = None,
+        tier: Optional[str] = None,
+        workers: int = 1,
+        resume: bool = True,
+) -> Dict[str, int]:
+    """
+    Censor many files with a pool of workers that share the loaded detectors.
+
+    Every finished file appends a record to the results manifest right away, so an interrupted
+    run can be resumed: files recorded as done with the same options whose output still exists
+    are skipped; failed, unfinished and differently censored ones are processed again.
+
+    :param inputs: Paths to media files.
+    :param results_path: JSON Lines manifest with {"input", "output", "status", "error", "seconds", "options"} records.
+    :param black_list: List of classes to censor.
+    :param pixelation: Use pixelation instead of drawing boxes.
+    :param style: Censor style, overrides `pixelation`.
+    :param tier: Latency/accuracy tier of the detectors.
+    :param workers: Number of files processed at the same time.
+    :param resume: Skip the files already done according to the manifest, otherwise start it over.
+    :return: Number of processed, failed and skipped files.
+    """
+    # A file censored with other classes, style or tier has to be censored again
+    options = {"black_list": sorted(black_list), "pixelation": pixelation, "style": style, "tier": tier}
+    done = set()
+    if resume:
+        done = {
+            path for path, record in load_results(results_path).items()
+            if record["status"] == "done" and record.get("options") == options
+            and record.get("output") and os.path.exists(record["output"])
+        }
+    elif os.path.exists(results_path):
+        os.remove(results_path)
+    pending = [path for path in inputs if path not in done]
+    stats = {"processed": 0, "failed": 0, "skipped": len(inputs) - len(pending)}
+    print(f"{len(pending)} files to process, {stats['skipped']} already done")
+
+    start = time.perf_counter()
+    processed_bytes = 0
+
+    def run(path: str) -> dict:
+        file_start = time.perf_counter()
+        output, error = None, None
+        with TempFilesManager().scope(uuid.uuid4().hex):
+            try:
+                output = process_file(path, black_list, pixelation, style, tier)
+                if output is None:
+                    error = "Processing failed, see the log"
+            except Exception as e:
+                error = str(e)
+        return {
+            "input": path,
+            "output": output,
+            "status": "failed" if error else "done",
+            "error": error,
+            "seconds": round(time.perf_counter() - file_start, 3),
+            "options": options,
+        }
+
+    os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+    executor = ThreadPoolExecutor(max_workers=max(workers, 1))
+    try:
+        with open(results_path, "a") as results_file:
+            futures = [executor.submit(run, path) for path in pending]
+            for finished, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                results_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                results_file.flush()
+                stats["failed" if record["error"] else "processed"] += 1
+                processed_bytes += os.path.getsize(record["input"])
+
+                elapsed = max(time.perf_counter() - start, 1e-9)
+                rate = finished / elapsed
+                print(
+                    f"[{finished}/{len(pending)}] {record['status']} {record['input']} in {record['seconds']}s | "
+                    f"{rate:.2f} files/s, {processed_bytes / elapsed / 2 ** 20:.2f} MB/s, "
+                    f"ETA {(len(pending) - finished) / rate:.0f}s"
+                )
+    finally:
+        # On Ctrl+C the queued files are dropped, the manifest already lists the finished ones
+        executor.shutdown(wait=True, cancel_futures=True)
+    return stats
@@ -0,0 +1,112 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Optional
+
+from backend_config import API_WORKERS, API_JOB_HISTORY_SIZE
+from utils import JOBS, JOB_SECONDS
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """
+    State of a submitted job.
+
+    :ivar id: Unique job id.
+    :ivar status: Current status.
+    :ivar result: Return value of the job function once it is done.
+    :ivar error: Error message if the job failed.
+    """
+    id: str
+    status: JobStatus = JobStatus.QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+
+class JobManager:
+    """
+    Runs blocking jobs in a thread pool and keeps their status for polling.
+
+    Worker threads live in the API process, so they share the detectors loaded by the plugin manager.
+    """
+
+    def __init__(self, workers: int = API_WORKERS, history_size: int = API_JOB_HISTORY_SIZE):
+        self.__executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="censor-job")
+        self.__history_size = history_size
+        self.__jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queues a job.
+
+        The job function receives the job id as the `job_id` keyword argument.
+
+        :param fn: Blocking function to run.
+        :return: The created job.
+        """
+        job = Job(id=str(uuid.uuid4()))
+        with self.__lock:
+            self.__jobs[job.id] = job
+            self.__forget_finished()
+        job.future = self.__executor.submit(self.__run, job, fn, *args, **kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        :param job_id: Job id returned by `submit`.
+        :return: The job, or None if it is unknown or was already forgotten.
+        """
+        with self.__lock:
+            return self.__jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        """
+        :return: Number of jobs that are queued or running.
+        """
+        with self.__lock:
+            return sum(job.status in (JobStatus.QUEUED, JobStatus.RUNNING) for job in self.__jobs.values())
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def __run(job: Job, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, job_id=job.id, **kwargs)
+            job.status = JobStatus.DONE
+            return job.result
+        except BaseException as e:
+            # SystemExit or KeyboardInterrupt from a job must not leave it running or reach the pool,
+            # the awaiting request gets a regular exception instead
+            job.error = str(e) or type(e).__name__
+            job.status = JobStatus.FAILED
+            if isinstance(e, Exception):
+                raise
+            raise RuntimeError(f"Job {job.id} was interrupted: {job.error}") from e
+        finally:
+            job.finished_at = time.time()
+            JOBS.labels(job.status.value).inc()
+            JOB_SECONDS.observe(job.finished_at - job.started_at)
+
+    def __forget_finished(self) -> None:
+        finished = [job_id for job_id, job in self.__jobs.items() if job.status in (JobStatus.DONE, JobStatus.FAILED)]
+        for job_id in finished[:max(len(finished) - self.__history_size, 0)]:
+            del self.__jobs[job_id]
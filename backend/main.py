@@ -1,15 +1,18 @@
 import os
 import sys
-from typing import Tuple
+from typing import Optional, Tuple
 
 import click
 
+from backend_config import BULK_RESULTS_FILE, BULK_WORKERS
+from bulk_processor import collect_inputs, is_bulk_source, process_bulk
 from main_file_processor import process_file
-from utils import TempFilesManager
+from processing.inference_policy import INFERENCE_TIERS
+from utils import CENSOR_STYLES, TempFilesManager
 
 
 @click.command()
-@click.argument("input_path", type=click.Path(exists=True))
+@click.argument("input_path")
 @click.option(
     "--black-list", "-b", multiple=True, default=None,
     help="Classes to censor (e.g. --black-list cigarette --black-list MALE_GENITALIA_EXPOSED)"
@@ -18,16 +21,56 @@ from utils import TempFilesManager
     "--pixelation/--no-pixelation", default=True,
     help="Pixelate or draw bounding boxes."
 )
+@click.option(
+    "--style", "-s", type=click.Choice(CENSOR_STYLES), default=None,
+    help="Censor style, overrides --pixelation/--no-pixelation."
+)
+@click.option(
+    "--tier", "-t", type=click.Choice(list(INFERENCE_TIERS)), default=None,
+    help="Latency/accuracy tier of the detectors (default: INFERENCE_TIER)."
+)
+@click.option(
+    "--workers", "-w", type=click.IntRange(min=1), default=BULK_WORKERS,
+    help="Bulk mode: number of files processed at the same time, sharing the loaded models."
+)
+@click.option(
+    "--results", "-r", type=click.Path(dir_okay=False), default=BULK_RESULTS_FILE,
+    help="Bulk mode: results manifest (JSON Lines)."
+)
+@click.option(
+    "--resume/--restart", default=True,
+    help="Bulk mode: skip the files the results manifest lists as done, or process everything again."
+)
 def main(
         input_path: str,
         black_list: Tuple[str, ...],
         pixelation: bool,
+        style: Optional[str],
+        tier: Optional[str],
+        workers: int,
+        results: str,
+        resume: bool,
 ) -> None:
     """
     Parse the input media and apply censorship.
+
+    INPUT_PATH is a media file, or for bulk mode a directory, a glob pattern (quote it)
+    or a manifest (.txt, .lst or .list) with one path per line.
     """
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    print(f"Censoring end {process_file(input_path, list(black_list), pixelation)}")
+    if not is_bulk_source(input_path):
+        if not os.path.exists(input_path):
+            raise click.BadParameter(f"Path '{input_path}' does not exist.", param_hint="INPUT_PATH")
+        print(f"Censoring end {process_file(input_path, list(black_list), pixelation, style, tier)}")
+    else:
+        try:
+            inputs = collect_inputs(input_path)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="INPUT_PATH")
+        if not inputs:
+            raise click.BadParameter(f"No media files found in '{input_path}'.", param_hint="INPUT_PATH")
+        stats = process_bulk(inputs, results, list(black_list), pixelation, style, tier, workers, resume)
+        print(f"Censoring end: {stats}, results in {results}")
 
     # Очистка временных файлов
     TempFilesManager().cleanup()
@@ -1,44 +1,365 @@
-from typing import List
+import asyncio
+import contextvars
+import json
+import mimetypes
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 
+import cv2
+import numpy as np
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
 from ultralytics.utils.checks import cuda_device_count
 
-from main_file_processor import process_file
-from utils import TempFilesManager
+from job_manager import JobManager, JobStatus
+from backend_config import (
+    ALL_MODELS, API_BATCH_IO_WORKERS, API_BATCH_MAX_ITEMS, API_BATCH_SIZE, API_LOG_JOB_TIMINGS, MINIO_STREAM_INPUT,
+    PLUGIN_IDLE_TIMEOUT_S,
+)
+from main_file_processor import process_file, select_models
+from plugins_system import default_plugin_manager
+from processing import censor_image, detect_images
+from processing.inference_policy import INFERENCE_TIERS
+from utils import CENSOR_STYLES, QUEUE_DEPTH, TempFilesManager, collect_timings, resolve_style, span
 from utils import minio_client
 
+BUCKET = "uploads"
+
 app = FastAPI()
+job_manager = JobManager()
+QUEUE_DEPTH.set_function(job_manager.queue_depth)
 
 
 class ProcessRequest(BaseModel):
     key: str
     black_list: List[str]
     pixelation: bool = True
+    style: Optional[str] = None  # pixelate, blur, fill or box; overrides pixelation
+    tier: Optional[str] = None  # fast, balanced or accurate; INFERENCE_TIER if not set
 
 
-@app.post("/process/")
-async def process_media(request: ProcessRequest):
-    try:
-        print(f"GPUs: {cuda_device_count()}")
-        bucket = "uploads"
-        local_input_path = minio_client.download_file(bucket, request.key, "temp_files")
+class BatchRequest(BaseModel):
+    items: List[ProcessRequest]
+
+
+def process_key(
+        key: str,
+        black_list: List[str],
+        pixelation: bool,
+        style: Optional[str],
+        tier: Optional[str],
+        job_id: str,
+) -> str:
+    """
+    Download an object from MinIO, censor it and upload the result.
+
+    Runs in a worker thread of the job manager; all temporary files of the job live in
+    their own directory and are removed when the job ends. Videos are decoded straight from
+    MinIO when possible, and the result is uploaded in parts while it is being produced.
+
+    :param key: Object key in the uploads bucket.
+    :param black_list: List of classes to censor.
+    :param pixelation: Use pixelation instead of drawing boxes.
+    :param style: Censor style, overrides `pixelation`.
+    :param tier: Latency/accuracy tier of the detectors.
+    :param job_id: Id of the job, used to isolate its temporary files.
+    :return: Key of the censored object.
+    """
+    with TempFilesManager().scope(job_id) as job_dir, collect_timings() as timings:
+        try:
+            name = minio_client.original_name(key)
+            if stream_input(name, black_list):
+                # The decoder reads the object over HTTP while the frames are censored
+                source = minio_client.presigned_url(BUCKET, key)
+            else:
+                source = minio_client.download_file(BUCKET, key, job_dir)
+                if source is None:
+                    raise RuntimeError(f"Failed to download {key}")
+
+            # Обработка файла и загрузка результата в MinIO по мере его кодирования
+            orig_name, orig_format = os.path.splitext(name)
+            result_name = f"{orig_name}_censor{orig_format}"
+            result_key = process_file(
+                source, black_list, pixelation, style, tier, name=name,
+                sink=lambda chunks: minio_client.upload_stream(BUCKET, result_name, chunks),
+            )
+            if result_key is None:
+                raise RuntimeError(f"Failed to process or upload {key}")
+        finally:
+            if API_LOG_JOB_TIMINGS:
+                print(f"Job {job_id} timings: {json.dumps(timings.summary())}")
+
+    return result_key
+
+
+def _load_image(key: str) -> np.ndarray:
+    # Images are decoded from memory, they never touch the disk
+    data = b"".join(minio_client.stream_object(BUCKET, key))
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Failed to decode image {key}")
+    return image
+
+
+def _store_image(item: ProcessRequest, image: np.ndarray, detections: List[Dict[str, Any]]) -> str:
+    _, black_list = select_models(item.black_list)
+    censor_image(image, detections, black_list, resolve_style(item.pixelation, item.style))
+
+    orig_name, orig_format = os.path.splitext(minio_client.original_name(item.key))
+    with span("image.encode"):
+        ok, encoded = cv2.imencode(orig_format, image)
+    if not ok:
+        raise RuntimeError(f"Failed to encode {item.key}")
+    result_key = minio_client.upload_stream(BUCKET, f"{orig_name}_censor{orig_format}", [encoded.tobytes()])
+    if result_key is None:
+        raise RuntimeError(f"Failed to upload the result of {item.key}")
+    return result_key
+
+
+def _submit(executor: ThreadPoolExecutor, fn: Callable, *args) -> Future:
+    # Every task runs in a copy of the context, so its time counts towards the current job
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _collect(
+        futures: Dict[int, Future],
+        results: List[Dict[str, Optional[str]]],
+        field: Optional[str] = None,
+) -> Dict[int, Any]:
+    """
+    Waits for the futures of the items; values go to `field` of the results (if given), errors to "error".
+
+    :return: Values of the items that succeeded.
+    """
+    values = {}
+    for i, future in futures.items():
+        try:
+            values[i] = future.result()
+            if field:
+                results[i][field] = values[i]
+        except Exception as e:
+            results[i]["error"] = str(e)
+    return values
+
+
+def process_batch(items: List[ProcessRequest], job_id: str) -> List[Dict[str, Optional[str]]]:
+    """
+    Censor many images stored in MinIO in one job.
+
+    Items are processed in chunks of API_BATCH_SIZE images: while a chunk is being detected
+    (see processing.detect_images), the next one is downloaded and the previous one is rendered,
+    encoded and uploaded, so at most three chunks of images are in memory. A failed key does not
+    fail the others.
+
+    :param items: Requests for image keys.
+    :param job_id: Id of the job.
+    :return: {"key", "result_key", "error"} for every item, in the same order.
+    """
+    results = [{"key": item.key, "result_key": None, "error": None} for item in items]
+    size = max(API_BATCH_SIZE, 1)
+    chunks = [range(start, min(start + size, len(items))) for start in range(0, len(items), size)]
+
+    def download(chunk: range) -> Dict[int, Future]:
+        return {i: _submit(executor, _load_image, items[i].key) for i in chunk}
+
+    with TempFilesManager().scope(job_id), collect_timings() as timings, \
+            ThreadPoolExecutor(max_workers=max(API_BATCH_IO_WORKERS, 1)) as executor:
+        try:
+            downloads = download(chunks[0]) if chunks else {}
+            uploads = {}
+            for n in range(len(chunks)):
+                images = _collect(downloads, results)
+                downloads = download(chunks[n + 1]) if n + 1 < len(chunks) else {}
+
+                loaded = list(images)
+                models = [
+                    [m for m in select_models(items[i].black_list)[0] if m != "bad_words_detector"] for i in loaded
+                ]
+                try:
+                    detections = detect_images([images[i] for i in loaded], models, [items[i].tier for i in loaded])
+                except Exception as e:
+                    detections = None
+                    for i in loaded:
+                        results[i]["error"] = f"Detection failed: {e}"
+
+                # The images of the previous chunk are released once they are uploaded
+                _collect(uploads, results, "result_key")
+                uploads = {}
+                if detections is not None:
+                    uploads = {
+                        i: _submit(executor, _store_image, items[i], images[i], image_detections)
+                        for i, image_detections in zip(loaded, detections)
+                    }
+                del images
+            _collect(uploads, results, "result_key")
+        finally:
+            if API_LOG_JOB_TIMINGS:
+                print(f"Job {job_id} timings: {json.dumps(timings.summary())}")
+
+    return results
+
+
+def is_image(key: str) -> bool:
+    mime_type, _ = mimetypes.guess_type(minio_client.original_name(key))
+    return mime_type is not None and mime_type.startswith("image")
 
-        # Обработка файла
-        processed_path = process_file(local_input_path, request.black_list, request.pixelation)
 
-        # Загрузка обратно в MinIO
-        result_key = minio_client.upload_file(bucket, processed_path)
+def stream_input(name: str, black_list: List[str]) -> bool:
+    """
+    Whether the object can be decoded from MinIO directly instead of being downloaded first.
 
-        # Очистка временных файлов
-        TempFilesManager().cleanup()
+    Only the video decoders read from a URL; censoring the audio track needs a local file.
+    """
+    mime_type, _ = mimetypes.guess_type(name)
+    censor_audio = not black_list or any(cls in ALL_MODELS["bad_words_detector"] for cls in black_list)
+    return MINIO_STREAM_INPUT and mime_type is not None and mime_type.startswith("video") and not censor_audio
 
+
+def request_error(request: ProcessRequest) -> Optional[str]:
+    """
+    :return: Why the request can't be processed, None if it is valid.
+    """
+    if request.tier is not None and request.tier not in INFERENCE_TIERS:
+        return f"Unknown tier {request.tier}, expected one of {list(INFERENCE_TIERS)}"
+    if request.style is not None and request.style not in CENSOR_STYLES:
+        return f"Unknown style {request.style}, expected one of {list(CENSOR_STYLES)}"
+    return None
+
+
+def validate_request(request: ProcessRequest) -> None:
+    error = request_error(request)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error)
+
+
+@app.post("/process/")
+async def process_media(request: ProcessRequest):
+    print(f"GPUs: {cuda_device_count()}")
+    validate_request(request)
+    job = job_manager.submit(
+        process_key, request.key, request.black_list, request.pixelation, request.style, request.tier
+    )
+    try:
+        # The job runs in the worker pool, the event loop stays free for other requests
+        result_key = await asyncio.wrap_future(job.future)
         return {"result_key": result_key}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/process/batch")
+async def process_media_batch(request: BatchRequest):
+    """
+    Censor many keys at once. Images are processed together in one batch job, other media
+    as regular jobs; an error of one key is reported in its entry and does not fail the request.
+    """
+    if len(request.items) > API_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {API_BATCH_MAX_ITEMS} items per batch")
+
+    results: List[Optional[Dict[str, Optional[str]]]] = [None] * len(request.items)
+    images, waiting = [], []
+    for i, item in enumerate(request.items):
+        error = request_error(item)
+        if error is not None:
+            results[i] = {"key": item.key, "result_key": None, "error": error}
+        elif is_image(item.key):
+            images.append(i)
+        else:
+            job = job_manager.submit(process_key, item.key, item.black_list, item.pixelation, item.style, item.tier)
+            waiting.append((i, job))
+
+    if images:
+        job = job_manager.submit(process_batch, [request.items[i] for i in images])
+        try:
+            for i, result in zip(images, await asyncio.wrap_future(job.future)):
+                results[i] = result
+        except Exception as e:
+            for i in images:
+                results[i] = {"key": request.items[i].key, "result_key": None, "error": str(e)}
+
+    for i, job in waiting:
+        result = {"key": request.items[i].key, "result_key": None, "error": None}
+        try:
+            result["result_key"] = await asyncio.wrap_future(job.future)
+        except Exception as e:
+            result["error"] = str(e)
+        results[i] = result
+
+    return {"results": results}
+
+
+@app.post("/jobs/")
+async def submit_job(request: ProcessRequest):
+    validate_request(request)
+    job = job_manager.submit(
+        process_key, request.key, request.black_list, request.pixelation, request.style, request.tier
+    )
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status.value}")
+    return {"result_key": job.result}
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "queue_depth": job_manager.queue_depth(),
+        "loaded_plugins": default_plugin_manager.loaded_plugins(),
+    }
+
+
+async def evict_idle_plugins(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        default_plugin_manager.evict()
+
+
+@app.on_event("startup")
+async def startup():
+    # Models are loaded before the first request instead of on it
+    await asyncio.get_running_loop().run_in_executor(None, default_plugin_manager.warm_up)
+    if PLUGIN_IDLE_TIMEOUT_S > 0:
+        asyncio.create_task(evict_idle_plugins(PLUGIN_IDLE_TIMEOUT_S / 2))
+
+
+@app.on_event("shutdown")
+def shutdown():
+    job_manager.shutdown()
+
+
 if __name__ == "__main__":
     uvicorn.run("main_API:app", host="0.0.0.0", port=8000, reload=True)
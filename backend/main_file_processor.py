@@ -1,82 +1,140 @@
+import contextvars
 import mimetypes
 import os
 import traceback
-from typing import List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
 
 import cv2
+import numpy as np
 
-from processing import process_image, process_video, process_audio
-from utils import TempFilesManager, add_audio_to_video, extract_audio
-from backend_config import ALL_MODELS
+from processing import process_image, process_video, process_audio, process_video_segments
+from utils import TempFilesManager, has_audio_track, mux_audio_video, traced, write_video
+from backend_config import ALL_MODELS, VIDEO_SEGMENT_WORKERS
 
 
-def save_output(output: Union[List, any], output_path: str, fps: Optional[int] = None) -> None:
+def save_output(
+        output: Union[Iterable[np.ndarray], np.ndarray],
+        output_path: str,
+        fps: Optional[int] = None,
+        audio_path: Optional[str] = None,
+        sink: Optional[Callable[[Iterator[bytes]], Any]] = None,
+) -> Any:
     """
     Save processed image or video frames to a file.
 
-    :param output: Processed image (numpy array) or list of frames.
+    Video frames are piped into a single ffmpeg process as soon as they are produced, so `output`
+    may be a lazy iterator; the audio track is muxed in the same pass.
+
+    :param output: Processed image (numpy array) or iterable of frames.
     :param output_path: Path to save the output.
     :param fps: FPS for video saving (required if saving video).
+    :param audio_path: Media file whose audio track is added to the video.
+    :param sink: Consumer of the encoded video bytes instead of the file (see utils.FFmpegVideoWriter).
+    :return: Result of the sink, None without one.
     """
-    if isinstance(output, list):  # video
-        height, width = output[0].shape[:2]
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        for frame in output:
-            out.write(frame)
-        out.release()
-    else:  # image
+    if isinstance(output, np.ndarray):  # image
         cv2.imwrite(output_path, output)
+        return None
+
+    return write_video(output, output_path, fps, audio_path, sink)  # video
+
+
+def select_models(black_list: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Models needed to censor the given classes.
+
+    :param black_list: List of classes to censor, empty for all of them.
+    :return: Models to apply and the effective list of classes.
+    """
+    if black_list:
+        models_to_apply = [model for model, classes in ALL_MODELS.items() if any(cls in black_list for cls in classes)]
+        return models_to_apply, black_list
+    return list(ALL_MODELS.keys()), [value for values in ALL_MODELS.values() for value in values]
 
 
+def _iter_file(path: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        yield from iter(lambda: file.read(chunk_size), b"")
+
+
+@traced("process_file")
 def process_file(
         input_path: str,
         black_list: List[str],
         pixelation: bool = True,
-) -> str:
+        style: Optional[str] = None,
+        tier: Optional[str] = None,
+        name: Optional[str] = None,
+        sink: Optional[Callable[[Iterator[bytes]], Any]] = None,
+) -> Any:
     """
     Automatically process image or video file.
 
     :param input_path: Path to media file.
     :param black_list: List of classes to censor.
     :param pixelation: Use pixelation instead of drawing boxes.
-    :return : censored output path
+    :param style: Censor style: pixelate, blur, fill or box; overrides `pixelation`.
+    :param tier: Latency/accuracy tier of the detectors: fast, balanced or accurate.
+    :param name: File name of the media, required if `input_path` is a URL (videos can be decoded
+                 from a URL directly); the output is then created in the temporary directory.
+    :param sink: Consumer of the output bytes, e.g. a streaming upload. An MP4 video encoded in a single pass
+                 is streamed into it while it is encoded, other outputs are fed to it from the file.
+    :return : censored output path, or the result of `sink` if given
     """
 
-    orig_name, orig_format = os.path.splitext(os.path.basename(input_path))
-    output_filename = os.path.join(os.path.dirname(input_path), f"{orig_name}_censor{orig_format}")
+    orig_name, orig_format = os.path.splitext(name or os.path.basename(input_path))
+    if name is None:
+        output_filename = os.path.join(os.path.dirname(input_path), f"{orig_name}_censor{orig_format}")
+    else:
+        output_filename = TempFilesManager().create_temp_file(f"{orig_name}_censor{orig_format}")
 
     try:
-        mime_type, _ = mimetypes.guess_type(input_path)
+        mime_type, _ = mimetypes.guess_type(name or input_path)
         if mime_type is None:
             raise ValueError("Unknown file format")
 
-        if black_list:
-            models_to_apply = [
-                model for model, classes in ALL_MODELS.items()
-                if any(cls in black_list for cls in classes)
-            ]
-        else:
-            models_to_apply = list(ALL_MODELS.keys())
-            black_list = [value for values in ALL_MODELS.values() for value in values]
+        models_to_apply, black_list = select_models(black_list)
 
         if mime_type.startswith('image'):
             if "bad_words_detector" in models_to_apply:
                 models_to_apply = [m for m in models_to_apply if m != "bad_words_detector"]
 
-            img_path = process_image(input_path, black_list, models_to_apply, pixelation)
+            img_path = process_image(input_path, black_list, models_to_apply, pixelation, style, tier)
             os.replace(img_path, output_filename)
 
         elif mime_type.startswith('video'):
-            frames, fps = process_video(input_path, black_list, models_to_apply, pixelation)
-            video_path = TempFilesManager().create_temp_file(f"{orig_name}_censor_video{orig_format}")
-            save_output(frames, video_path, fps)
-
-            audio_path = extract_audio(input_path)
-            if "bad_words_detector" in models_to_apply:
-                audio_path = process_audio(audio_path)
-
-            add_audio_to_video(audio_path, video_path, output_filename)
+            # The audio track does not depend on the frames, so it is censored in parallel
+            # and joined with the encoded video only at mux time
+            with ThreadPoolExecutor(max_workers=1) as audio_executor:
+                audio_future = None
+                # A video without an audio track has nothing to transcribe
+                if "bad_words_detector" in models_to_apply and has_audio_track(input_path):
+                    audio_future = audio_executor.submit(contextvars.copy_context().run, process_audio, input_path)
+
+                video_path = None
+                if VIDEO_SEGMENT_WORKERS > 1:
+                    video_path = TempFilesManager().create_temp_file(f"{orig_name}_censor_video.mp4")
+                    process_video_segments(
+                        input_path, video_path, black_list, models_to_apply, pixelation, style, tier
+                    )
+                elif audio_future is not None:
+                    video_path = TempFilesManager().create_temp_file(f"{orig_name}_censor_video.mp4")
+                    frames, fps = process_video(input_path, black_list, models_to_apply, pixelation, style, tier)
+                    save_output(frames, video_path, fps)
+                else:
+                    # The original audio track goes straight into the output in the same encoding pass
+                    frames, fps = process_video(input_path, black_list, models_to_apply, pixelation, style, tier)
+                    if sink is not None and orig_format.lower() == ".mp4":
+                        # The encoded video goes to the sink while the next frames are being censored;
+                        # the stream is always MP4, so other containers are written to the file first
+                        return save_output(frames, None, fps, input_path, sink)
+                    save_output(frames, output_filename, fps, input_path)
+
+                audio_path = audio_future.result() if audio_future is not None else input_path
+
+            if video_path is not None:
+                mux_audio_video(video_path, audio_path, output_filename)
 
         elif mime_type.startswith('audio'):
             audio_path = process_audio(input_path)
@@ -85,6 +143,8 @@ def process_file(
         else:
             raise ValueError("File is not an image or video")
 
+        if sink is not None:
+            return sink(_iter_file(output_filename))
         return output_filename
 
     except Exception as e:
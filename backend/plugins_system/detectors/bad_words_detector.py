@@ -1,40 +1,74 @@
 import json
-import math
+import mimetypes
 import os.path
 import traceback
-import wave
+from contextlib import nullcontext
 
-from langchain_core.messages import HumanMessage, SystemMessage
+from backend_config import PROFANITY_LLM_TIMEOUT_S, PROFANITY_MODE
 from langchain_gigachat import GigaChat
 from pydub import AudioSegment
-from utils import TempFilesManager, audio_format_transcoder
-from vosk import Model, KaldiRecognizer
+from utils import TempFilesManager, censor_audio, content_hash, detection_cache, file_hash, has_audio_track, \
+    iter_pcm_chunks
+from vosk import Model
 
+from ..profanity import LLMProfanityClassifier, ProfanityLexicon, Verdict, normalize_word
+from ..speech import RecognizerPool, transcribe
 from .base_detector import *
 
 
 class BadWordsDetector(BaseDetector):
-    def __init__(self):
+    def __init__(self, profanity_mode: str = PROFANITY_MODE, llm_client: Optional[Any] = None):
+        """
+        :param profanity_mode: "hybrid", "offline" or "llm", see PROFANITY_MODE.
+        :param llm_client: Chat model used to classify words, GigaChat if not given. Any object with a
+                           langchain-style `invoke(messages)` method works, e.g. a local stand-in.
+        """
         super().__init__('models/vosk-model-small-ru-0.22')
+        if profanity_mode not in ("hybrid", "offline", "llm"):
+            raise ValueError(f"Unknown profanity mode '{profanity_mode}'")
+        self.__profanity_mode = profanity_mode
         self.__model = Model(self.model_path)
-        self.__recognizer = KaldiRecognizer(self.__model, 16000)
-        self.__giga_client = self.__setup_gigachat_client(os.getenv("GIGA_CHAT_KEY"))
+        self.__recognizers = RecognizerPool(self.__model, 16000)
+        # Every call takes its own recognizers from the pool, so jobs don't have to wait for each other
+        self.lock = nullcontext()
+        self.__lexicon = ProfanityLexicon()
+        self.__llm_classifier = None
+        if profanity_mode != "offline":
+            if llm_client is None:
+                llm_client = self.__setup_gigachat_client(os.getenv("GIGA_CHAT_KEY"))
+            self.__llm_classifier = LLMProfanityClassifier(llm_client)
 
     def detect(self, media: Any) -> List[Dict[str, Any]]:
         """
         Detects In the Given Audio Using a Trained Vosk Model and Gigachat LLM API, obscene vocabulary.
 
-        :param media: Input audio path.
+        :param media: Input audio path, or a video path whose audio track is censored.
         :return: path for output audio file.
+        :raises RuntimeError: If the media has no audio track.
         """
 
-        try:
-            timestamps = self.__get_word_timestamps_vosk(media)
-        except Exception as e:
-            print(f"AudioError: {traceback.format_exc()}")
-            exit(1)
-
-        result = json.loads(self.__detect_profanity(timestamps))
+        # The result is a temporary file the caller moves away, so the input can't stand in for it
+        if not has_audio_track(media):
+            raise RuntimeError(f"in detect(BadWordsDetector) {media} has no audio track")
+
+        # Transcripts and verdicts are cached by content, so re-running a file skips Vosk and GigaChat
+        transcript_key = content_hash(self.identity, "transcript", file_hash(media))
+        timestamps = detection_cache.get(transcript_key)
+        if timestamps is None:
+            try:
+                timestamps = self.__get_word_timestamps_vosk(media)
+            except Exception as e:
+                print(f"AudioError: {traceback.format_exc()}")
+                raise RuntimeError(f"in detect(BadWordsDetector) Could not transcribe {media}: {e}") from e
+            detection_cache.set(transcript_key, timestamps)
+
+        # The lexicon version invalidates the results whenever the lexicon changes
+        profanity_key = content_hash(self.__profanity_mode, self.__lexicon.version, "profanity", json.dumps(timestamps))
+        result = detection_cache.get(profanity_key)
+        if result is None:
+            result, complete = self.__find_profanity(timestamps)
+            if complete:  # words without an LLM verdict are asked again next time
+                detection_cache.set(profanity_key, result)
 
         return self.__censor_audio(result, media, "models/censor_sound.mp3")
 
@@ -42,41 +76,52 @@ class BadWordsDetector(BaseDetector):
         """
         Removes temporary marks of words from the audio file using the VOSK model.
 
-        :param audio_path: The path to the audio file for processing.
+        :param audio_path: The path to the audio (or video) file for processing.
         :return: A list of dictionaries containing information about words and their time tags.
         """
+        # The audio is decoded straight to 16 kHz mono PCM, cut at silences and the chunks
+        # are transcribed in parallel
         try:
-            correct_format_audio = audio_format_transcoder(audio_path)
+            return transcribe(iter_pcm_chunks(audio_path, sample_rate=16000, chunk_size=8000), self.__recognizers)
         except RuntimeError as e:
             raise RuntimeError(
-                f"in get_word_timestamps_vosk(BadWordsDetector) Could not convert audio file: {traceback.format_exc()}") from e
-
-        self.__recognizer.SetWords(True)
-
-        with wave.open(correct_format_audio, 'rb') as audio_file:
-            results = []
-            while True:
-                data = audio_file.readframes(4000)
-                if len(data) == 0:
-                    break
-                if self.__recognizer.AcceptWaveform(data):
-                    part_result = json.loads(self.__recognizer.Result())
-                    results.append(part_result)
-
-            final_result = json.loads(self.__recognizer.FinalResult())
-            results.append(final_result)
-
-        word_timestamps = []
-        for res in results:
-            if 'result' in res:
-                for word_info in res['result']:
-                    word_timestamps.append({
-                        'word': word_info['word'],
-                        'start': word_info['start'],
-                        'end': word_info['end']
-                    })
-
-        return word_timestamps
+                f"in get_word_timestamps_vosk(BadWordsDetector) Could not decode audio file: {traceback.format_exc()}") from e
+
+    def __find_profanity(self, timestamps_words: list[dict[str, str | float]]) -> tuple[dict[str, list], bool]:
+        """
+        Finds profane words of a transcript.
+
+        In the "hybrid" and "offline" modes the offline lexicon decides first; in "hybrid" mode
+        only the words it can't decide are sent to the LLM, in "offline" mode they count as clean.
+        In "llm" mode every word goes to the LLM. The LLM only sees unique word forms, the verdicts
+        are mapped back to the timestamps here. Words whose LLM request failed or timed out fall
+        back to the lexicon and are censored unless it finds them clean.
+
+        :param timestamps_words: A list of dictionaries containing word information and their timestamps.
+        :return: {"profanity_timestamps": [...]} with the profane words and their timestamps, and
+                 whether every word got a verdict (False if an LLM request failed).
+        """
+        unresolved = set()
+        if self.__profanity_mode == "llm":
+            profane, unresolved = self.__llm_classifier.classify_complete(word['word'] for word in timestamps_words)
+        else:
+            verdicts = self.__lexicon.classify_many(word['word'] for word in timestamps_words)
+            profane = {form for form, verdict in verdicts.items() if verdict == Verdict.PROFANE}
+            unknown = [form for form, verdict in verdicts.items() if verdict == Verdict.UNKNOWN]
+
+            if unknown and self.__profanity_mode == "hybrid":
+                llm_profane, unresolved = self.__llm_classifier.classify_complete(unknown)
+                profane.update(llm_profane)
+
+        if unresolved:
+            fallback = {form for form in unresolved if self.__lexicon.classify(form) != Verdict.CLEAN}
+            print(f"Warning: {len(unresolved)} words got no LLM verdict, {len(fallback)} of them are censored "
+                  f"by the lexicon")
+            profane.update(fallback)
+
+        return {
+            "profanity_timestamps": [word for word in timestamps_words if normalize_word(word['word']) in profane]
+        }, not unresolved
 
     def __setup_gigachat_client(self, auth_token: str) -> GigaChat:
         """
@@ -89,68 +134,10 @@ class BadWordsDetector(BaseDetector):
             model="GigaChat-2",
             verify_ssl_certs=False,
             temperature=0.1,  # Low temperature for more precise responses
-            scope="GIGACHAT_API_PERS"
+            scope="GIGACHAT_API_PERS",
+            timeout=PROFANITY_LLM_TIMEOUT_S,  # a hung request must not keep a classifier thread forever
         )
 
-    def __prepare_profanity_detection_prompt(self, timestamps_words: list[dict[str, float]]) -> str:
-        """
-        Prepares a prompt for detecting profanity words.
-        :param timestamps_words: A list of dictionaries containing word information and their timestamps.
-        :return: A formatted text message for profanity detection.
-        """
-        words_str = "\n".join([
-            f"Word: {word['word']}, Start: {word['start']}, End: {word['end']}"
-            for word in timestamps_words
-        ])
-
-        return f"""
-    Твоя задача - проанализировать следующий список слов и определить, 
-    какие из них являются матерными. Для каждого матерного слова верни 
-    JSON с его временными метками:
-
-    {words_str}
-
-    Верни результат в формате JSON:
-    {{
-        "profanity_timestamps": [
-            {{
-                "word": "матерное_слово",
-                "start": начало_метки,
-                "end": конец_метки
-            }},
-            ...
-        ]
-    }}
-
-    Если матерных слов нет, верни пустой список.
-    """
-
-    def __detect_profanity(self, timestamps_words: list[dict[str, float]]) -> list[dict[str, float]]:
-        """
-        Detects profanity words using the GigaChat client.
-
-        :param timestamps_words: A list of dictionaries containing word information and their timestamps.
-        :return: A list of dictionaries with profanity words and their timestamps.
-                 Returns `None` if an error occurs during the request.
-        """
-        prompt = self.__prepare_profanity_detection_prompt(timestamps_words)
-
-        # print(prompt)
-
-        messages = [
-            SystemMessage(content="Ты помощник, который точно определяет матерные слова."),
-            HumanMessage(content=prompt)
-        ]
-
-        try:
-            response = self.__giga_client.invoke(messages)
-            print(response.content)
-            return response.content
-
-        except Exception as e:
-            print(f"Error during request: {traceback.format_exc()}")
-            return None
-
     def __censor_audio(self, profanity_timestamps: list[dict[str, str | float]], orig_audio_path, censor_sound) -> str:
         """
         Censors profanity words in audio recordings.
@@ -160,42 +147,13 @@ class BadWordsDetector(BaseDetector):
         :return output_filename : path to the censorned audio.
         """
         orig_name, orig_format = os.path.splitext(os.path.basename(orig_audio_path))
+        mime_type, _ = mimetypes.guess_type(orig_audio_path)
+        if mime_type is None or not mime_type.startswith('audio'):
+            orig_format = ".wav"  # audio track of a video container
         output_filename = TempFilesManager().create_temp_file(f"{orig_name}_censor{orig_format}")
 
         orig_audio = AudioSegment.from_file(orig_audio_path)
-
-        if not profanity_timestamps or not profanity_timestamps["profanity_timestamps"]:  # Проверяем, что список пуст
-            orig_audio.export(output_filename, format=orig_format[1:])
-            return output_filename
-
-        censor_sound = AudioSegment.from_file(censor_sound)
-        censor_sound = (
-            censor_sound
-            .set_sample_width(orig_audio.sample_width)
-            .set_frame_rate(orig_audio.frame_rate)
-            .set_channels(orig_audio.channels)
-        )
-
-        censored_audio = AudioSegment.empty()
-
-        profanity_timestamps = profanity_timestamps["profanity_timestamps"]
-
-        last_position = 0
-
-        for item in profanity_timestamps:
-            start_ms = item["start"] * 1000  # in milliseconds
-            end_ms = item["end"] * 1000
-            duration = end_ms - start_ms
-
-            censored_audio += orig_audio[last_position:start_ms]
-
-            censor_segment = (censor_sound * math.ceil(duration / len(censor_sound)))[:duration]
-            censored_audio += censor_segment
-
-            last_position = end_ms
-
-        censored_audio += orig_audio[last_position:]
-
+        censored_audio = censor_audio(orig_audio, (profanity_timestamps or {}).get("profanity_timestamps", []), censor_sound)
         censored_audio.export(output_filename, format=orig_format[1:])
 
         return output_filename
@@ -1,5 +1,8 @@
+import os
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, List, Dict
+from functools import cached_property
+from typing import Any, List, Dict, Optional
 
 import torch
 
@@ -8,11 +11,57 @@ DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
 
 class BaseDetector(ABC):
+    # Side of the square RGB tensor the detector accepts from the shared preprocessing stage,
+    # None if the detector only works with raw inputs
+    input_size: Optional[int] = None
+    # Inference backend of the model, part of the identity since backends may disagree on borderline boxes
+    backend: str = ""
+
     def __init__(self, model_path: str):
         self.model = None
         self.model_path = model_path
         self.device = DEVICE
+        self.lock = threading.Lock()  # Models are shared between jobs, but a single model call is not thread-safe
+
+    @cached_property
+    def identity(self) -> str:
+        """
+        Identifies the detector and its weights for caching: class, backend, model path, size and modification time.
+        """
+        stat = os.stat(self.model_path)
+        return (f"{type(self).__name__}:{self.backend}:{os.path.abspath(self.model_path)}:"
+                f"{stat.st_size}:{stat.st_mtime_ns}")
 
     @abstractmethod
     def detect(self, img: Any) -> List[Dict[str, Any]]:
         pass
+
+    def detect_batch(self, images: List[Any]) -> List[List[Dict[str, Any]]]:
+        """
+        Detects objects in several inputs at once.
+
+        The default implementation calls `detect` for every input; detectors whose model
+        accepts a batch should override it with a single call, like YoloDetectorMixin.
+
+        :param images: List of inputs (paths or arrays), or a prepared input tensor
+                       if the detector declares `input_size`.
+        :return: List of detections for every input, in the same order.
+        """
+        return [self.detect(img) for img in images]
+
+
+def parse_yolo_result(result: Any) -> List[Dict[str, Any]]:
+    """
+    Converts a single ultralytics result into the detector output format.
+
+    :param result: Ultralytics `Results` object for one image.
+    :return: List of detected objects with class name, bounding box and confidence.
+    """
+    parsed = []
+    names = result.names
+    for box in result.boxes:
+        x1, y1, x2, y2 = map(int, box.xyxy[0])
+        class_name = names[int(box.cls[0])]
+        parsed.append({'class': class_name, 'box': (x1, y1, x2, y2), 'conf': float(box.conf[0])})
+
+    return parsed
@@ -1,29 +1,16 @@
 import os
 
-from ultralytics import YOLO
+from backend_config import YOLO_BACKEND
 
 from .base_detector import *
+from .yolo_mixin import YoloDetectorMixin
 
 
-class NudeDetector(BaseDetector):
-    def __init__(self):
-        super().__init__(os.path.abspath('models/nudenet640m.pt'))
-        self.model = YOLO(self.model_path)
-
-    def detect(self, img: Any) -> List[Dict[str, Any]]:
-        """
-        Detects cigarettes in the given image using a trained YOLO model.
-
-        :param img: Input image (path or array).
-        :return: List of detected objects with class name and bounding box.
-        """
-        results = self.model(img, imgsz=(IMAGE_SIZE, IMAGE_SIZE), device=self.device)
-        parsed = []
+class NudeDetector(YoloDetectorMixin, BaseDetector):
+    """
+    Detects nudity with a trained YOLO model.
+    """
 
-        names = results[0].names
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            class_name = names[int(box.cls[0])]
-            parsed.append({'class': class_name, 'box': (x1, y1, x2, y2)})
-
-        return parsed
\ No newline at end of file
+    def __init__(self, backend: str = YOLO_BACKEND):
+        super().__init__(os.path.abspath('models/nudenet640m.pt'))
+        self.load_model(backend)
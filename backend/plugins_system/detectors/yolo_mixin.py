@@ -0,0 +1,38 @@
+from ..inference import load_yolo
+from .base_detector import *
+
+
+class YoloDetectorMixin:
+    """
+    Detection with a YOLO model on the configured backend (see YOLO_BACKEND), for detectors
+    derived from BaseDetector: `class NudeDetector(YoloDetectorMixin, BaseDetector)`.
+
+    :cvar predict_args: Extra arguments of every model call, e.g. the NMS IoU threshold.
+    """
+    input_size = IMAGE_SIZE
+    predict_args: Dict[str, Any] = {}
+
+    def load_model(self, backend: str) -> None:
+        """
+        Loads the weights at `model_path` with the given backend.
+        """
+        self.model = load_yolo(self.model_path, backend, IMAGE_SIZE)
+        self.backend = self.model.backend  # "onnx_int8" falls back to "onnx" without calibration images
+
+    def detect(self, img: Any) -> List[Dict[str, Any]]:
+        """
+        :param img: Input image (path or array).
+        :return: List of detected objects with class name and bounding box.
+        """
+        return self.detect_batch([img])[0]
+
+    def detect_batch(self, images: List[Any]) -> List[List[Dict[str, Any]]]:
+        """
+        Detects objects in several images with a single call of the model.
+
+        :param images: List of input images (paths or arrays) or a letterboxed RGB tensor (B, 3, H, W).
+        :return: List of detected objects for every image, in the same order.
+        """
+        if not isinstance(images, torch.Tensor):
+            images = list(images)
+        return self.model(images, imgsz=IMAGE_SIZE, **self.predict_args)
@@ -0,0 +1,8 @@
+from .yolo_backends import YOLO_BACKENDS, OnnxYolo, TorchYolo, load_yolo
+
+__all__ = [
+    "YOLO_BACKENDS",
+    "OnnxYolo",
+    "TorchYolo",
+    "load_yolo",
+]
@@ -0,0 +1,229 @@
+import ast
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+from backend_config import (
+    ONNX_CACHE_DIR,
+    ONNX_CALIBRATION_DIR,
+    ONNX_CALIBRATION_IMAGES,
+    ONNX_INTER_OP_THREADS,
+    ONNX_INTRA_OP_THREADS,
+    YOLO_BACKEND,
+)
+from ultralytics import YOLO
+
+from ..detectors.base_detector import DEVICE, parse_yolo_result
+
+YOLO_BACKENDS = ("torch", "onnx", "onnx_int8")
+CONF_THRESHOLD = 0.25  # ultralytics defaults, so every backend keeps the same boxes
+MAX_DETECTIONS = 300
+
+
+class TorchYolo:
+    """
+    Eager PyTorch inference through ultralytics.
+    """
+    backend = "torch"
+
+    def __init__(self, model_path: str):
+        self.model = YOLO(model_path)
+
+    def __call__(self, images: Any, imgsz: int, iou: float = 0.7) -> List[List[Dict[str, Any]]]:
+        """
+        :param images: List of inputs (paths or arrays) or a letterboxed RGB tensor (B, 3, H, W).
+        :param imgsz: Input side used for raw inputs.
+        :param iou: IoU threshold of NMS.
+        :return: Detections for every image; for a tensor in its coordinates.
+        """
+        results = self.model(images, imgsz=(imgsz, imgsz), device=DEVICE, iou=iou)
+        return [parse_yolo_result(result) for result in results]
+
+
+class OnnxYolo:
+    """
+    CPU inference of an exported YOLO model with ONNX Runtime.
+
+    The export (and the INT8 variant) is cached next to the other models and keyed by the weights'
+    size and modification time, so it is only done again when the weights change.
+    """
+
+    def __init__(self, model_path: str, int8: bool = False, imgsz: int = 640):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The onnx backends need onnxruntime: pip install onnx onnxruntime") from e
+
+        self.backend = "onnx_int8" if int8 else "onnx"
+        onnx_path = export_onnx(model_path, imgsz)
+        if int8:
+            int8_path = quantize_onnx(onnx_path, imgsz)
+            if int8_path == onnx_path:
+                self.backend = "onnx"  # no calibration images, the FP32 model is used
+            onnx_path = int8_path
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+        options.inter_op_num_threads = ONNX_INTER_OP_THREADS
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.names = ast.literal_eval(self.session.get_modelmeta().custom_metadata_map["names"])
+
+    def __call__(self, images: Any, imgsz: int, iou: float = 0.7) -> List[List[Dict[str, Any]]]:
+        """
+        :param images: List of inputs (paths or arrays) or a letterboxed RGB tensor (B, 3, H, W).
+        :param imgsz: Input side used for raw inputs.
+        :param iou: IoU threshold of NMS.
+        :return: Detections for every image; for a tensor in its coordinates.
+        """
+        if isinstance(images, torch.Tensor):
+            return self.__run(images.detach().cpu().numpy().astype(np.float32), iou)
+
+        # Imported here: processing imports plugins_system, which is still initializing at import time
+        from processing.preprocessing import prepare_batch, restore_boxes
+
+        arrays = [cv2.imread(image) if isinstance(image, str) else image for image in images]
+        if not arrays:
+            return []
+        prepared = prepare_batch(arrays, imgsz)
+        detections = self.__run(prepared.tensor.cpu().numpy(), iou)
+        return [
+            restore_boxes(image_detections, ratio, pad, shape)
+            for image_detections, ratio, pad, shape in
+            zip(detections, prepared.ratios, prepared.pads, prepared.shapes)
+        ]
+
+    def __run(self, batch: np.ndarray, iou: float) -> List[List[Dict[str, Any]]]:
+        output = self.session.run(None, {self.input_name: batch})[0]  # (B, 4 + classes, anchors)
+        return [self.__postprocess(prediction, iou) for prediction in output]
+
+    def __postprocess(self, prediction: np.ndarray, iou: float) -> List[Dict[str, Any]]:
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        classes = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), classes]
+        keep = confidences > CONF_THRESHOLD
+        if not keep.any():
+            return []
+
+        cx, cy, w, h = prediction[keep, :4].T
+        boxes = torch.from_numpy(np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1))
+        classes = torch.from_numpy(classes[keep])
+        confidences = torch.from_numpy(confidences[keep])
+        kept = torchvision.ops.batched_nms(boxes, confidences, classes, iou)[:MAX_DETECTIONS]
+        return [
+            {
+                'class': self.names[int(classes[i])],
+                'box': tuple(int(v) for v in boxes[i].tolist()),
+                'conf': float(confidences[i]),
+            }
+            for i in kept.tolist()
+        ]
+
+
+def _cache_path(model_path: str, suffix: str) -> str:
+    stat = os.stat(model_path)
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(ONNX_CACHE_DIR, f"{name}-{stat.st_size}-{stat.st_mtime_ns}{suffix}.onnx")
+
+
+def export_onnx(model_path: str, imgsz: int = 640) -> str:
+    """
+    Exports YOLO weights to ONNX with a dynamic input shape, once.
+
+    The export runs on a copy of the weights in a temporary directory and is moved into the
+    cache atomically, so concurrent workers never see a half-written file.
+
+    :return: Path of the cached ONNX model.
+    """
+    onnx_path = _cache_path(model_path, "")
+    if os.path.exists(onnx_path):
+        return onnx_path
+
+    os.makedirs(ONNX_CACHE_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=ONNX_CACHE_DIR) as tmp_dir:
+        weights = shutil.copy(model_path, tmp_dir)
+        exported = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        os.replace(exported, onnx_path)
+    print(f"Exported {model_path} to {onnx_path}")
+    return onnx_path
+
+
+def _calibration_images(limit: int = ONNX_CALIBRATION_IMAGES) -> List[str]:
+    patterns = ("*.jpg", "*.jpeg", "*.png", "*.bmp", "*.webp")
+    paths = sorted(path for pattern in patterns for path in glob.glob(os.path.join(ONNX_CALIBRATION_DIR, pattern)))
+    return paths[:limit]
+
+
+def quantize_onnx(onnx_path: str, imgsz: int = 640) -> str:
+    """
+    Quantizes an ONNX model to INT8 with static calibration, once.
+
+    Activation ranges are calibrated on the images in ONNX_CALIBRATION_DIR, which should look
+    like the production data. Without calibration images the FP32 model is used.
+
+    The cached model is keyed by the calibration set, so changing the images quantizes again.
+
+    :return: Path of the cached INT8 model, or `onnx_path` if there is nothing to calibrate on.
+    """
+    images = _calibration_images()
+    if not images:
+        print(f"Warning: no calibration images in {ONNX_CALIBRATION_DIR}, using the FP32 ONNX model")
+        return onnx_path
+
+    calibration = hashlib.sha1()
+    for path in images:
+        stat = os.stat(path)
+        calibration.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    int8_path = f"{os.path.splitext(onnx_path)[0]}-int8-{calibration.hexdigest()[:12]}.onnx"
+    if os.path.exists(int8_path):
+        return int8_path
+
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from processing.preprocessing import prepare_batch
+
+    class CalibrationReader(CalibrationDataReader):
+        def __init__(self, input_name: str):
+            self.__batches = (
+                {input_name: prepare_batch([cv2.imread(path)], imgsz).tensor.cpu().numpy()} for path in images
+            )
+
+        def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+            return next(self.__batches, None)
+
+    import onnxruntime as ort
+
+    input_name = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+    quantize_static(
+        onnx_path, tmp_path, CalibrationReader(input_name),
+        quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    os.replace(tmp_path, int8_path)
+    print(f"Quantized {onnx_path} to {int8_path} on {len(images)} images")
+    return int8_path
+
+
+def load_yolo(model_path: str, backend: str = YOLO_BACKEND, imgsz: int = 640) -> Any:
+    """
+    Loads YOLO weights with the chosen inference backend.
+
+    :param model_path: Path to the .pt weights.
+    :param backend: One of YOLO_BACKENDS.
+    :param imgsz: Input side used for the export.
+    :return: Callable `model(images, imgsz, iou)` returning parsed detections for every image.
+    """
+    if backend == "torch":
+        return TorchYolo(model_path)
+    if backend in ("onnx", "onnx_int8"):
+        return OnnxYolo(model_path, int8=backend == "onnx_int8", imgsz=imgsz)
+    raise ValueError(f"Unknown YOLO backend '{backend}', expected one of {YOLO_BACKENDS}")
@@ -1,16 +1,55 @@
 import importlib
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Type
 
+from backend_config import PLUGIN_EVICTION_GRACE_S, PLUGIN_IDLE_TIMEOUT_S, PLUGIN_MEMORY_BUDGET_MB
 from plugins_system.detectors.base_detector import BaseDetector
 
 
+def _model_size(model_path: str) -> int:
+    """
+    Size of a model file or directory on disk, used as an estimate of its memory footprint.
+    """
+    if os.path.isdir(model_path):
+        return sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(model_path) for name in names
+        )
+    return os.path.getsize(model_path) if os.path.exists(model_path) else 0
+
+
 class PluginManager:
+    """
+    Registers detector classes from the plugins directory and creates detectors on first use.
 
-    def __init__(self, plugins_dir: str = "plugins_system/detectors"):
+    Loading a model is expensive, so only the detectors a request actually needs are created.
+    Servers can create them ahead with `warm_up`. Optionally, detectors that were not used for
+    `idle_timeout` seconds, or the least recently used ones over `memory_budget_mb`, are unloaded
+    and created again when needed. Detectors used within the last `eviction_grace` seconds are
+    kept even over the budget, otherwise a request needing more than the budget would reload its
+    models on every call.
+    """
+
+    def __init__(
+            self,
+            plugins_dir: str = "plugins_system/detectors",
+            idle_timeout: float = PLUGIN_IDLE_TIMEOUT_S,
+            memory_budget_mb: int = PLUGIN_MEMORY_BUDGET_MB,
+            eviction_grace: float = PLUGIN_EVICTION_GRACE_S,
+    ):
         self.__plugins_dir = Path(plugins_dir)
+        self.__idle_timeout = idle_timeout
+        self.__memory_budget = memory_budget_mb * 1024 * 1024
+        self.__eviction_grace = eviction_grace
+        self.__over_budget_warned = False
+        self.__plugins: Dict[str, Type[BaseDetector]] = {}
         self.__detectors: Dict[str, BaseDetector] = {}
+        self.__last_used: Dict[str, float] = {}
+        self.__sizes: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+        self.__loading: Dict[str, threading.Lock] = {}
 
     def load_plugins(self):
         target_pattern = "*.py"
@@ -28,9 +67,102 @@ class PluginManager:
                         attribute != BaseDetector
                 ):
                     plugin = plugin_name.lower()
-                    self.__detectors[plugin] = attribute()
+                    self.__plugins[plugin] = attribute
+
+    def available_plugins(self) -> List[str]:
+        return sorted(self.__plugins)
+
+    def loaded_plugins(self) -> List[str]:
+        with self.__lock:
+            return sorted(self.__detectors)
 
     def get_detector(self, plugin_name: str) -> BaseDetector:
-        if plugin_name not in self.__detectors:
+        if plugin_name not in self.__plugins:
+            raise Exception(f"Plugin '{plugin_name}' not found")
+
+        with self.__lock:
+            detector = self.__detectors.get(plugin_name)
+            if detector is not None:
+                self.__last_used[plugin_name] = time.monotonic()
+                return detector
+            loading = self.__loading.setdefault(plugin_name, threading.Lock())
+
+        # Models are loaded outside of the manager lock, so loading one detector doesn't block the others,
+        # and concurrent first requests for the same detector load it once
+        with loading:
+            with self.__lock:
+                detector = self.__detectors.get(plugin_name)
+            if detector is None:
+                start = time.perf_counter()
+                detector = self.__plugins[plugin_name]()
+                print(f"Loaded plugin '{plugin_name}' in {time.perf_counter() - start:.2f}s")
+                with self.__lock:
+                    self.__detectors[plugin_name] = detector
+                    self.__sizes[plugin_name] = _model_size(detector.model_path)
+
+        with self.__lock:
+            self.__last_used[plugin_name] = time.monotonic()
+        self.evict(keep=plugin_name)
+        return detector
+
+    def warm_up(self, plugin_names: Optional[Iterable[str]] = None) -> None:
+        """
+        Creates detectors ahead of the first request.
+
+        :param plugin_names: Plugins to load, all registered plugins if not given.
+        """
+        for plugin_name in plugin_names or self.available_plugins():
+            self.get_detector(plugin_name)
+
+    def set_detector(self, plugin_name: str, detector: BaseDetector) -> None:
+        """
+        Uses a ready detector for a plugin, e.g. one built with a local stand-in for a remote service.
+        """
+        if plugin_name not in self.__plugins:
             raise Exception(f"Plugin '{plugin_name}' not found")
-        return self.__detectors[plugin_name]
+        with self.__lock:
+            self.__detectors[plugin_name] = detector
+            self.__last_used[plugin_name] = time.monotonic()
+            self.__sizes[plugin_name] = _model_size(detector.model_path)
+
+    def unload(self, plugin_name: str) -> None:
+        """
+        Drops a detector; calls that already hold it finish normally.
+        """
+        with self.__lock:
+            if self.__detectors.pop(plugin_name, None) is not None:
+                self.__last_used.pop(plugin_name, None)
+                self.__sizes.pop(plugin_name, None)
+                print(f"Unloaded plugin '{plugin_name}'")
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Unloads idle detectors and the least recently used ones over the memory budget.
+
+        :param keep: Plugin that must stay loaded, e.g. the one just requested.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            by_last_use = sorted((name for name in self.__detectors if name != keep), key=self.__last_used.get)
+            to_unload = []
+            if self.__idle_timeout > 0:
+                to_unload = [name for name in by_last_use if now - self.__last_used[name] > self.__idle_timeout]
+            if self.__memory_budget > 0:
+                total = sum(size for name, size in self.__sizes.items() if name not in to_unload)
+                for name in by_last_use:
+                    if total <= self.__memory_budget or now - self.__last_used[name] <= self.__eviction_grace:
+                        break
+                    if name not in to_unload:
+                        to_unload.append(name)
+                        total -= self.__sizes[name]
+                over_budget = total > self.__memory_budget
+                if over_budget and not self.__over_budget_warned:
+                    in_use = sorted(name for name in self.__detectors if name not in to_unload)
+                    print(
+                        f"Warning: detectors in use {in_use} need {total / 2 ** 20:.0f} MB, more than the "
+                        f"{self.__memory_budget / 2 ** 20:.0f} MB budget; they are kept loaded"
+                    )
+                self.__over_budget_warned = over_budget
+
+        for name in to_unload:
+            self.unload(name)
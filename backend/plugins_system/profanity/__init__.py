@@ -0,0 +1,9 @@
+from .lexicon import ProfanityLexicon, Verdict, normalize_word
+from .llm_classifier import LLMProfanityClassifier
+
+__all__ = [
+    "LLMProfanityClassifier",
+    "ProfanityLexicon",
+    "Verdict",
+    "normalize_word",
+]
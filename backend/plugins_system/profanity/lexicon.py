@@ -0,0 +1,131 @@
+import hashlib
+import re
+from enum import Enum
+from typing import Dict, Iterable, Sequence
+
+# Latin letters that look like Cyrillic ones, used to hide obscene words in text
+_LOOKALIKES = str.maketrans("aeopcxyk", "аеорсхук")
+
+# Prefixes that obscene roots take in Russian (за-ебать, вы-ебон, разъ-ебай, рас-пиздяй, ...)
+_PREFIXES = r"(?:за|на|вы|у|от|отъ|по|раз|разъ|рас|съ|въ|об|объ|до|при|про|пере|под|подъ|недо|вз|взъ|из|изъ|с|в|о|долбо)?"
+
+# Roots that are obscene in every inflection. A word is profane only if it starts with one of
+# them, possibly after a prefix; a root found elsewhere in a word ("скипидар", "небанальный")
+# makes the word ambiguous. Roots with "^" don't take prefixes.
+OBSCENE_PATTERNS: Sequence[str] = (
+    r"ху[йеияю]",
+    r"пизд",
+    # "с" and "в" + "еб" would also match "себастьян" or "вебинар", those prefixes are spelled "съ", "въ"
+    r"(?<!^[св])еб(?:а|у|ы|е|ол|он|л|ну|ош|ис|к|ун|ук|ок|ищ|ич|ля|ли|от|ло|уч|$)",
+    r"бля[дт]",
+    r"^бля$",
+    r"муд(?:ак|ил|оз|ач|еб)",
+    r"^манд(?!ар|ат|ол)(?:а|ы|у|е|ой|ою|ав)",
+    r"залуп",
+    r"г[ао]ндон",
+    r"пид[оа]р",
+    r"^педик(?:и|а|ов|у|ам|ами)?$",
+    r"шлюх",
+    r"^су(?:ка|ки|ку|ке|кой|чка|чки|чку|чара|ченыш)$",
+    r"дроч",
+    r"^(?:на|по|ни)?хер(?:ня|ню|ни|ов|ово)?$",
+)
+
+# Normal words that contain one of the stems above or below. Words starting with an obscene
+# root are never exceptions, so these only turn ambiguous words into clean ones
+EXCEPTION_PATTERNS: Sequence[str] = (
+    r"страху",
+    r"колеб",
+    r"греб",
+    r"хлеб",
+    r"стеб",
+    r"блях",
+    r"бляш",
+    r"педикюр",
+    r"команд",
+    r"скипидар",
+    # "еб" inside common words: тебе, небеса, небанальный, учеба, ребенок, требую, хребет, лебедь
+    r"^[тн]еб",
+    r"(?:уч|р|тр|хр|щ|л|жер)еб",
+    # -блять verbs and nouns ending in -бль: употреблять, оскорблять, ослаблять, углублять, рубля, корабля
+    r"(?:тре|р|сла|глу|зло|дро|ру|ра|жа|ду|са|м)бля",
+)
+
+# Stems that are obscene only in some words or contexts; such words are left to the LLM
+AMBIGUOUS_PATTERNS: Sequence[str] = (
+    # A word-initial "еб" root with an ending the obscene pattern doesn't know
+    rf"^{_PREFIXES}(?<!^[св])еб",
+    r"^сук",
+    r"^сучь?",
+    r"хер",
+    r"трах",
+    r"жоп",
+    r"говн",
+    r"^с[рс]а[лт]",
+    r"бля",
+    r"муд[ао]",
+    r"ху[йеияю]",
+)
+
+
+def normalize_word(word: str) -> str:
+    """
+    Lowercases a word, replaces "ё" with "е" and Latin lookalikes with Cyrillic letters.
+
+    :param word: Word as recognized by Vosk.
+    :return: Normalized word form.
+    """
+    return word.lower().replace("ё", "е").translate(_LOOKALIKES)
+
+
+class Verdict(str, Enum):
+    PROFANE = "profane"
+    CLEAN = "clean"
+    UNKNOWN = "unknown"
+
+
+class ProfanityLexicon:
+    """
+    Offline matcher of Russian obscene vocabulary.
+
+    Every list of stems is compiled into a single regular expression, so a word is checked against
+    the whole lexicon in one pass. A word is profane if it starts with an obscene root, possibly
+    after a prefix. Words that contain an obscene root elsewhere or match an ambiguous stem get
+    `Verdict.UNKNOWN`, unless an exception marks them clean.
+
+    :ivar version: Hash of the patterns, changes whenever the lexicon is edited.
+    """
+
+    def __init__(
+            self,
+            obscene: Sequence[str] = OBSCENE_PATTERNS,
+            exceptions: Sequence[str] = EXCEPTION_PATTERNS,
+            ambiguous: Sequence[str] = AMBIGUOUS_PATTERNS,
+    ):
+        self.__obscene = re.compile(rf"^{_PREFIXES}(?:{'|'.join(obscene)})")
+        self.__obscene_anywhere = re.compile("|".join(obscene))
+        self.__exceptions = re.compile("|".join(exceptions))
+        self.__ambiguous = re.compile("|".join(ambiguous))
+        patterns = "\n".join(["|".join(obscene), "|".join(exceptions), "|".join(ambiguous)])
+        self.version = hashlib.sha1(patterns.encode("utf-8")).hexdigest()[:12]
+
+    def classify(self, word: str) -> Verdict:
+        """
+        :param word: A single word.
+        :return: Verdict for the word.
+        """
+        word = normalize_word(word)
+        if self.__obscene.match(word):
+            return Verdict.PROFANE
+        if self.__exceptions.search(word):
+            return Verdict.CLEAN
+        if self.__obscene_anywhere.search(word) or self.__ambiguous.search(word):
+            return Verdict.UNKNOWN
+        return Verdict.CLEAN
+
+    def classify_many(self, words: Iterable[str]) -> Dict[str, Verdict]:
+        """
+        :param words: Words, repetitions allowed.
+        :return: Verdict for every distinct normalized word form.
+        """
+        return {form: self.classify(form) for form in {normalize_word(word) for word in words}}
@@ -0,0 +1,189 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend_config import (
+    PROFANITY_LLM_CHUNK_SIZE,
+    PROFANITY_LLM_WORKERS,
+    PROFANITY_LLM_TIMEOUT_S,
+    PROFANITY_VERDICT_CACHE,
+)
+from langchain_core.messages import HumanMessage, SystemMessage
+from utils import traced
+
+from .lexicon import normalize_word
+
+SYSTEM_PROMPT = "Ты помощник, который точно определяет матерные слова."
+
+
+def _prepare_prompt(words: List[str]) -> str:
+    """
+    Prepares a prompt that asks which of the words are obscene.
+
+    :param words: Unique word forms.
+    :return: A formatted text message for profanity detection.
+    """
+    words_str = "\n".join(words)
+    return f"""
+    Твоя задача - проанализировать следующий список слов и определить, 
+    какие из них являются матерными:
+
+    {words_str}
+
+    Верни результат в формате JSON:
+    {{
+        "profanity": ["матерное_слово", ...]
+    }}
+
+    Если матерных слов нет, верни пустой список.
+    """
+
+
+def _parse_response(content: str) -> List[str]:
+    """
+    Extracts the list of profane words from a model response, which may be wrapped in markdown.
+    """
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    if match is None:
+        raise ValueError(f"No JSON object in the response: {content!r}")
+    return json.loads(match.group(0)).get("profanity", [])
+
+
+class LLMProfanityClassifier:
+    """
+    Classifies word forms as profane with a chat model.
+
+    Only unique normalized forms that have no verdict yet are sent, in chunks of bounded size and
+    concurrently, every chunk with a timeout counted from its start. Verdicts are kept in a JSON
+    file, so a word seen once never costs a request again.
+
+    The client is anything with a langchain-style `invoke(messages)` method returning an object with
+    a `content` string, which allows replacing GigaChat with a local stand-in.
+    """
+
+    def __init__(
+            self,
+            client: Any,
+            chunk_size: int = PROFANITY_LLM_CHUNK_SIZE,
+            max_workers: int = PROFANITY_LLM_WORKERS,
+            timeout: float = PROFANITY_LLM_TIMEOUT_S,
+            verdict_cache_path: Optional[str] = PROFANITY_VERDICT_CACHE,
+    ):
+        self.__client = client
+        self.__chunk_size = max(chunk_size, 1)
+        self.__max_workers = max(max_workers, 1)
+        self.__timeout = timeout
+        self.__verdict_cache_path = verdict_cache_path
+        self.__verdicts: Dict[str, bool] = self.__load_verdicts()
+        self.__lock = threading.Lock()
+
+    def classify(self, words: Iterable[str]) -> Set[str]:
+        """
+        :param words: Words, repetitions allowed.
+        :return: Normalized forms of the words that are profane. Forms whose request failed or
+                 timed out are not included and not remembered.
+        """
+        return self.classify_complete(words)[0]
+
+    @traced("llm.classify")
+    def classify_complete(self, words: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """
+        Like `classify`, and also tells which forms got no verdict.
+
+        Every chunk has `timeout` seconds from the moment a worker starts it, so chunks queued behind
+        others are not cut short. The whole call is bounded by one timeout per wave of chunks.
+
+        :param words: Words, repetitions allowed.
+        :return: Normalized profane forms, and the forms whose request failed or timed out.
+        """
+        forms = {normalize_word(word) for word in words}
+        with self.__lock:
+            unseen = sorted(form for form in forms if form not in self.__verdicts)
+
+        if unseen:
+            chunks = [unseen[i:i + self.__chunk_size] for i in range(0, len(unseen), self.__chunk_size)]
+            workers = min(self.__max_workers, len(chunks))
+            started: Dict[int, float] = {}
+
+            def run(index: int) -> Set[str]:
+                started[index] = time.monotonic()
+                return self.__classify_chunk(chunks[index])
+
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = {executor.submit(run, index): index for index in range(len(chunks))}
+            deadline = time.monotonic() + self.__timeout * math.ceil(len(chunks) / workers)
+            pending, new_verdicts, failed = set(futures), {}, []
+            while pending:
+                now = time.monotonic()
+                expired = {
+                    future for future in pending
+                    if futures[future] in started and now >= started[futures[future]] + self.__timeout
+                }
+                if now >= deadline:
+                    expired = pending
+                failed.extend(futures[future] for future in expired)
+                pending -= expired
+                if not pending:
+                    break
+                # Wake up when a chunk finishes or the first running one runs out of time
+                ends = [started[futures[future]] + self.__timeout for future in pending if futures[future] in started]
+                done, pending = wait(pending, timeout=max(min(ends + [deadline]) - now, 0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        profane = future.result()
+                    except Exception:
+                        print(f"Error during request: {traceback.format_exc()}")
+                        failed.append(futures[future])
+                        continue
+                    new_verdicts.update({form: form in profane for form in chunks[futures[future]]})
+            # A hung request keeps its thread until the client's own timeout ends it
+            executor.shutdown(wait=False, cancel_futures=True)
+            if failed:
+                print(f"Warning: {len(failed)} of {len(chunks)} profanity requests failed or timed out "
+                      f"after {self.__timeout}s, their words got no verdict")
+
+            with self.__lock:
+                self.__verdicts.update(new_verdicts)
+                self.__save_verdicts()
+
+        with self.__lock:
+            return (
+                {form for form in forms if self.__verdicts.get(form, False)},
+                {form for form in forms if form not in self.__verdicts},
+            )
+
+    def __classify_chunk(self, chunk: List[str]) -> Set[str]:
+        messages = [
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=_prepare_prompt(chunk)),
+        ]
+        response = self.__client.invoke(messages)
+        return {normalize_word(word) for word in _parse_response(response.content)} & set(chunk)
+
+    def __load_verdicts(self) -> Dict[str, bool]:
+        if not self.__verdict_cache_path or not os.path.exists(self.__verdict_cache_path):
+            return {}
+        try:
+            with open(self.__verdict_cache_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            print(f"Warning: could not read profanity verdicts: {traceback.format_exc()}")
+            return {}
+
+    def __save_verdicts(self) -> None:
+        if not self.__verdict_cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.__verdict_cache_path)), exist_ok=True)
+            tmp_path = f"{self.__verdict_cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.__verdicts, file, ensure_ascii=False)
+            os.replace(tmp_path, self.__verdict_cache_path)
+        except OSError:
+            print(f"Warning: could not save profanity verdicts: {traceback.format_exc()}")
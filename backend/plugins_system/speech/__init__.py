@@ -0,0 +1,8 @@
+from .recognizer_pool import RecognizerPool
+from .transcriber import split_at_silences, transcribe
+
+__all__ = [
+    "RecognizerPool",
+    "split_at_silences",
+    "transcribe",
+]
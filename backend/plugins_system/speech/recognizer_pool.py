@@ -0,0 +1,38 @@
+import queue
+from contextlib import contextmanager
+from typing import Iterator
+
+from backend_config import VOSK_POOL_SIZE
+from vosk import KaldiRecognizer, Model
+
+
+class RecognizerPool:
+    """
+    A fixed set of Kaldi recognizers over one shared Vosk model.
+
+    The model is read-only and can be shared, but a recognizer keeps the decoding state of its
+    stream, so every chunk or job takes a recognizer of its own and gives it back reset.
+    """
+
+    def __init__(self, model: Model, sample_rate: int = 16000, size: int = VOSK_POOL_SIZE):
+        self.sample_rate = sample_rate
+        self.size = max(size, 1)
+        self.__recognizers = queue.Queue()
+        for _ in range(self.size):
+            recognizer = KaldiRecognizer(model, sample_rate)
+            recognizer.SetWords(True)
+            self.__recognizers.put(recognizer)
+
+    @contextmanager
+    def acquire(self) -> Iterator[KaldiRecognizer]:
+        """
+        Takes a recognizer, waiting while all of them are in use.
+
+        :return: Context manager yielding a recognizer with a clean state.
+        """
+        recognizer = self.__recognizers.get()
+        try:
+            yield recognizer
+        finally:
+            recognizer.Reset()
+            self.__recognizers.put(recognizer)
@@ -0,0 +1,110 @@
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+from backend_config import VOSK_CHUNK_SECONDS, VOSK_SILENCE_SEARCH_SECONDS
+from utils import traced
+
+from .recognizer_pool import RecognizerPool
+
+_FEED_SIZE = 8000  # bytes passed to the recognizer at once
+_SILENCE_FRAME_SECONDS = 0.03  # resolution of the silence search
+
+
+def _quietest_cut(samples: np.ndarray, start: int, sample_rate: int) -> int:
+    """
+    Finds the middle of the quietest frame of `samples[start:]`.
+
+    :return: Sample index to cut at.
+    """
+    frame = max(int(sample_rate * _SILENCE_FRAME_SECONDS), 1)
+    tail = samples[start:].astype(np.float32)
+    frames_count = len(tail) // frame
+    if frames_count == 0:
+        return len(samples)
+    energy = np.square(tail[:frames_count * frame]).reshape(frames_count, frame).mean(axis=1)
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+def split_at_silences(
+        pcm_chunks: Iterable[bytes],
+        sample_rate: int = 16000,
+        chunk_seconds: float = VOSK_CHUNK_SECONDS,
+        search_seconds: float = VOSK_SILENCE_SEARCH_SECONDS,
+) -> Iterator[Tuple[float, bytes]]:
+    """
+    Regroups a stream of mono 16-bit PCM into chunks of about `chunk_seconds`.
+
+    Every chunk ends at the quietest point of its last `search_seconds`, so words are rarely cut
+    in half. Only the chunk being collected is kept in memory.
+
+    :param pcm_chunks: Raw s16le data in pieces of any size.
+    :param sample_rate: Sample rate of the data.
+    :param chunk_seconds: Target chunk length.
+    :param search_seconds: Length of the chunk end searched for silence.
+    :return: Iterator over (offset in seconds, chunk data).
+    """
+    target = max(int(chunk_seconds * sample_rate), 1)
+    search = min(int(search_seconds * sample_rate), target)
+    buffer = bytearray()
+    offset = 0  # in samples
+
+    for data in pcm_chunks:
+        buffer += data
+        while len(buffer) // 2 >= target + search:
+            # A copy: a view would keep the bytearray from being resized below
+            samples = np.frombuffer(bytes(buffer[:target * 2]), dtype=np.int16)
+            cut = _quietest_cut(samples, target - search, sample_rate)
+            yield offset / sample_rate, bytes(buffer[:cut * 2])
+            del buffer[:cut * 2]
+            offset += cut
+
+    if len(buffer) >= 2:
+        yield offset / sample_rate, bytes(buffer[:len(buffer) // 2 * 2])
+
+
+def _transcribe_chunk(pool: RecognizerPool, offset: float, data: bytes) -> List[dict]:
+    """
+    Transcribes one chunk with a recognizer from the pool.
+
+    :return: Words with timestamps shifted by the chunk offset.
+    """
+    results = []
+    with pool.acquire() as recognizer:
+        for i in range(0, len(data), _FEED_SIZE):
+            if recognizer.AcceptWaveform(data[i:i + _FEED_SIZE]):
+                results.append(json.loads(recognizer.Result()))
+        results.append(json.loads(recognizer.FinalResult()))
+
+    return [
+        {'word': word_info['word'], 'start': word_info['start'] + offset, 'end': word_info['end'] + offset}
+        for res in results
+        for word_info in res.get('result', [])
+    ]
+
+
+@traced("audio.transcribe")
+def transcribe(pcm_chunks: Iterable[bytes], pool: RecognizerPool) -> List[dict]:
+    """
+    Transcribes a stream of mono 16-bit PCM in parallel chunks cut at silences.
+
+    At most two chunks per recognizer are waiting in memory; the words are merged in playback
+    order with timestamps relative to the start of the stream.
+
+    :param pcm_chunks: Raw s16le data at the sample rate of the pool.
+    :param pool: Recognizers to use.
+    :return: A list of dictionaries containing the words and their timestamps.
+    """
+    word_timestamps = []
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        for offset, data in split_at_silences(pcm_chunks, pool.sample_rate):
+            pending.append(executor.submit(_transcribe_chunk, pool, offset, data))
+            if len(pending) >= pool.size * 2:
+                word_timestamps.extend(pending.popleft().result())
+        while pending:
+            word_timestamps.extend(pending.popleft().result())
+
+    return word_timestamps
@@ -1,11 +1,13 @@
 from .audio_processor import process_audio
-from .image_processor import process_image
-from .model import model
+from .image_processor import censor_image, detect_images, process_image
+from .model import model, model_batch
+from .segment_processor import process_video_segments
 from .video_processor import process_video
 
 __all__ = [
     "audio_processor",
     "image_processor",
     "video_processor",
+    "segment_processor",
     "model",
 ]
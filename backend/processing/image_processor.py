@@ -1,11 +1,60 @@
 import os
 import traceback
-from typing import List, Optional
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
 
 import cv2
-from utils import TempFilesManager, pixelation_box, draw_box
+import numpy as np
+from backend_config import API_BATCH_SIZE
+from utils import TempFilesManager, render_censor, resolve_style
 
-from .model import model
+from .model import model, model_batch
+
+
+def censor_image(image: np.ndarray, results: List[Dict[str, Any]], black_list: List[str], style: str) -> np.ndarray:
+    """
+    Censor the detected regions of the black-listed classes in place.
+
+    :param image: BGR image.
+    :param results: Detections of the image.
+    :param black_list: List of class names to censor.
+    :param style: Censor style (see utils.CENSOR_STYLES).
+    :return: The same image.
+    """
+    censored = [result for result in results if result['class'] in black_list]
+    render_censor(image, [result['box'] for result in censored], [result['class'] for result in censored], style)
+    return image
+
+
+def detect_images(
+        images: Sequence[np.ndarray],
+        models_to_apply: Sequence[List[str]],
+        tiers: Sequence[Optional[str]],
+        batch_size: int = API_BATCH_SIZE,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Detect objects on many independent images, each with its own models and tier.
+
+    Images that need the same models in the same tier are sent to the detectors together,
+    `batch_size` images per call.
+
+    :param images: BGR images.
+    :param models_to_apply: Models to use for the image with the same index.
+    :param tiers: Latency/accuracy tier for the image with the same index.
+    :param batch_size: Maximal number of images per detector call.
+    :return: Detections of every image, in the same order.
+    """
+    groups = defaultdict(list)
+    for i, (models, tier) in enumerate(zip(models_to_apply, tiers)):
+        groups[(tuple(models), tier)].append(i)
+
+    results = [[] for _ in images]
+    for (models, tier), indices in groups.items():
+        for start in range(0, len(indices), max(batch_size, 1)):
+            chunk = indices[start:start + max(batch_size, 1)]
+            for i, detections in zip(chunk, model_batch([images[i] for i in chunk], list(models), tier)):
+                results[i] = detections
+    return results
 
 
 def process_image(
@@ -13,6 +62,8 @@ def process_image(
         black_list: List[str],
         models_to_apply: List[str],
         pixelation: bool = True,
+        style: Optional[str] = None,
+        tier: Optional[str] = None,
 ) -> Optional[any]:
     """
     Process an image: detect and censor regions.
@@ -21,6 +72,8 @@ def process_image(
     :param black_list: List of class names to censor.
     :param models_to_apply: Models to use.
     :param pixelation: Apply pixelation if True, else draw boxes.
+    :param style: Censor style (see utils.CENSOR_STYLES), overrides `pixelation`.
+    :param tier: Latency/accuracy tier of the detectors (see processing.inference_policy).
     """
     try:
         orig_name, orig_format = os.path.splitext(os.path.basename(input_path))
@@ -29,16 +82,9 @@ def process_image(
         image = cv2.imread(input_path)
         if image is None:
             raise ValueError(f"Failed to read image from {input_path}")
-        results = model(image, models_to_apply)
-
-        for result in results:
-            class_name = result['class']
-            x1, y1, x2, y2 = result['box']
-            if class_name in black_list:
-                if pixelation:
-                    pixelation_box(image, x1, y1, x2, y2)
-                else:
-                    draw_box(image, x1, y1, x2, y2, class_name)
+        results = model(image, models_to_apply, tier)
+
+        censor_image(image, results, black_list, resolve_style(pixelation, style))
         cv2.imwrite(output_path, image)
         return output_path
     except Exception as e:
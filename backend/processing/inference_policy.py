@@ -0,0 +1,92 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import torch
+import torchvision
+from backend_config import INFERENCE_TIER, TILE_MIN_SIDE, TILE_NMS_IOU, TILE_OVERLAP, TILE_SIZE
+
+STRIDE = 32  # Input sides of the YOLO models must be multiples of it
+
+
+class InferencePolicy(NamedTuple):
+    """
+    How images are fed to the detectors.
+
+    :ivar name: Tier name, part of the detection cache key.
+    :ivar scale: Input side relative to the detector's `input_size`.
+    :ivar tiling: Slice large images into overlapping tiles in addition to the whole image.
+    """
+    name: str
+    scale: float
+    tiling: bool
+
+    def input_side(self, input_size: int) -> int:
+        return max(round(input_size * self.scale / STRIDE), 1) * STRIDE
+
+
+INFERENCE_TIERS: Dict[str, InferencePolicy] = {
+    "fast": InferencePolicy("fast", 0.75, False),
+    "balanced": InferencePolicy("balanced", 1.0, False),
+    "accurate": InferencePolicy("accurate", 1.0, True),
+}
+
+
+def get_policy(tier: Optional[str] = None) -> InferencePolicy:
+    """
+    :param tier: Tier name, INFERENCE_TIER if not given.
+    :return: Inference policy of the tier.
+    """
+    tier = tier or INFERENCE_TIER
+    if tier not in INFERENCE_TIERS:
+        raise ValueError(f"Unknown inference tier '{tier}', expected one of {tuple(INFERENCE_TIERS)}")
+    return INFERENCE_TIERS[tier]
+
+
+def _tile_origins(length: int, tile: int, stride: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    # The last tile is aligned to the edge, so all tiles have the same size
+    return list(range(0, length - tile, stride)) + [length - tile]
+
+
+def make_tiles(
+        shape: Tuple[int, int],
+        tile_size: int = TILE_SIZE,
+        overlap: float = TILE_OVERLAP,
+        min_side: int = TILE_MIN_SIDE,
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Splits an image into overlapping tiles of the same size.
+
+    :param shape: (height, width) of the image.
+    :param tile_size: Side of a tile.
+    :param overlap: Share of a tile that overlaps its neighbour.
+    :param min_side: Images whose longer side is shorter are not tiled.
+    :return: Tiles as (x1, y1, x2, y2), empty if the image is not tiled.
+    """
+    h, w = shape
+    if max(h, w) < min_side:
+        return []
+    stride = max(int(tile_size * (1 - overlap)), 1)
+    return [
+        (x, y, min(x + tile_size, w), min(y + tile_size, h))
+        for y in _tile_origins(h, tile_size, stride)
+        for x in _tile_origins(w, tile_size, stride)
+    ]
+
+
+def merge_detections(detections: List[Dict[str, Any]], iou: float = TILE_NMS_IOU) -> List[Dict[str, Any]]:
+    """
+    Merges detections of the whole image and its tiles with class-wise NMS.
+
+    :param detections: Detections in image coordinates.
+    :param iou: IoU above which the less confident of two boxes of a class is dropped.
+    :return: Detections without duplicates from overlapping tiles.
+    """
+    if len(detections) < 2:
+        return detections
+    class_ids = {}
+    boxes = torch.tensor([detection['box'] for detection in detections], dtype=torch.float32)
+    scores = torch.tensor([detection.get('conf', 1.0) for detection in detections], dtype=torch.float32)
+    classes = torch.tensor([class_ids.setdefault(detection['class'], len(class_ids)) for detection in detections])
+    keep = torchvision.ops.batched_nms(boxes, scores, classes, iou)
+    return [detections[i] for i in keep.tolist()]
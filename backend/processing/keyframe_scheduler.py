@@ -0,0 +1,114 @@
+from typing import Any, Dict
+
+import cv2
+import numpy as np
+from backend_config import (
+    KEYFRAME_MIN_INTERVAL_S,
+    KEYFRAME_MAX_INTERVAL_S,
+    SCENE_CUT_THRESHOLD,
+    STATIC_MOTION_THRESHOLD,
+    HIGH_MOTION_THRESHOLD,
+)
+
+THUMBNAIL_SIZE = (64, 36)  # Frames are compared on tiny grayscale thumbnails
+
+
+class KeyframeScheduler:
+    """
+    Decides on which frames the detectors run.
+
+    The base rate is two keyframes per second. The interval doubles while the content stays static
+    (up to KEYFRAME_MAX_INTERVAL_S) and halves on fast motion (down to KEYFRAME_MIN_INTERVAL_S).
+    A scene cut or a tracker failure forces a keyframe.
+    """
+
+    def __init__(self, fps: float):
+        """
+        :param fps: FPS of the video.
+        """
+        self.__fps = max(fps, 1)
+        self.__base_interval = max(int(self.__fps // 2), 1)
+        self.__min_interval = max(int(self.__fps * KEYFRAME_MIN_INTERVAL_S), 1)
+        self.__max_interval = max(int(self.__fps * KEYFRAME_MAX_INTERVAL_S), self.__base_interval)
+        self.__interval = self.__base_interval
+
+        self.__prev_thumbnail = None
+        self.__prev_hist = None
+        self.__since_keyframe = 0
+        self.__motion_sum = 0.0
+
+        self.__frames = 0
+        self.__keyframes = 0
+        self.__scene_cuts = 0
+        self.__tracker_failures = 0
+
+    def is_keyframe(self, frame: np.ndarray) -> bool:
+        """
+        Must be called for every frame in playback order.
+
+        :param frame: BGR frame.
+        :return: True if the detectors have to run on this frame.
+        """
+        thumbnail = cv2.cvtColor(cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        hist = cv2.calcHist([thumbnail], [0], None, [32], [0, 256])
+        cv2.normalize(hist, hist)
+
+        scene_cut = False
+        if self.__prev_thumbnail is not None:
+            self.__motion_sum += float(cv2.absdiff(thumbnail, self.__prev_thumbnail).mean())
+            scene_cut = cv2.compareHist(self.__prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA) > SCENE_CUT_THRESHOLD
+        self.__prev_thumbnail, self.__prev_hist = thumbnail, hist
+
+        self.__frames += 1
+        keyframe = self.__frames == 1 or scene_cut or self.__since_keyframe + 1 >= self.__interval
+        if keyframe:
+            self.__scene_cuts += scene_cut
+            self.__adapt_interval(scene_cut)
+            self.__keyframes += 1
+            self.__since_keyframe = 0
+            self.__motion_sum = 0.0
+        else:
+            self.__since_keyframe += 1
+        return keyframe
+
+    def report_tracker_failure(self) -> None:
+        """
+        Called when the tracker lost a box and the frame was re-detected; falls back to the base rate.
+        """
+        self.__tracker_failures += 1
+        self.__interval = min(self.__interval, self.__base_interval)
+
+    @property
+    def min_interval(self) -> int:
+        """
+        :return: Minimal number of frames between two detections.
+        """
+        return self.__min_interval
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: Number of processed frames, detections, scene cuts and tracker failures,
+                 and detections per minute of video.
+        """
+        detections = self.__keyframes + self.__tracker_failures
+        minutes = self.__frames / self.__fps / 60
+        return {
+            "frames": self.__frames,
+            "keyframes": self.__keyframes,
+            "scene_cuts": self.__scene_cuts,
+            "tracker_failures": self.__tracker_failures,
+            "detections_per_minute": round(detections / minutes, 1) if minutes else 0.0,
+        }
+
+    def __adapt_interval(self, scene_cut: bool) -> None:
+        if scene_cut or self.__frames == 1:
+            self.__interval = self.__base_interval
+            return
+
+        motion = self.__motion_sum / (self.__since_keyframe + 1)  # mean difference since the previous keyframe
+        if motion < STATIC_MOTION_THRESHOLD:
+            self.__interval = min(self.__interval * 2, self.__max_interval)
+        elif motion > HIGH_MOTION_THRESHOLD:
+            self.__interval = max(self.__interval // 2, self.__min_interval)
+        else:
+            self.__interval = self.__base_interval
@@ -1,22 +1,182 @@
 import traceback
-from typing import Any, List
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from utils import content_hash, detection_cache, span, traced
 
 from plugins_system import default_plugin_manager
+from .inference_policy import InferencePolicy, get_policy, make_tiles, merge_detections
+from .preprocessing import PreparedBatch, prepare_batch, restore_boxes
+
+# Frame indices, (x, y) offsets and the prepared tensor of inference units batched together
+_UnitGroup = Tuple[List[int], List[Tuple[int, int]], PreparedBatch]
 
 
-def model(media: Any, models_to_apply: List[str]) -> List[dict[str, Any]]:
+def model(media: Any, models_to_apply: List[str], tier: Optional[str] = None) -> List[dict[str, Any]]:
     """
     Run selected models on the image.
 
     :param img: Image to process.
     :param models_to_apply: List of model names.
+    :param tier: Latency/accuracy tier (see processing.inference_policy), INFERENCE_TIER if not given.
     :return: List of detection results.
     """
-    results = []
+    return model_batch([media], models_to_apply, tier)[0]
+
+
+def _from_cache(cached: Optional[List[dict[str, Any]]]) -> Optional[List[dict[str, Any]]]:
+    if cached is None:
+        return None
+    return [{**detection, 'box': tuple(detection['box'])} for detection in cached]
+
+
+def _prepare_units(
+        frames: Dict[int, np.ndarray],
+        input_size: int,
+        policy: InferencePolicy,
+) -> Tuple[List[_UnitGroup], Set[int]]:
+    """
+    Splits frames into inference units (the whole frame and, if the policy tiles it, its tiles)
+    and prepares one input tensor per unit shape, plus one square tensor for the units of unique shapes.
+
+    :return: Prepared unit groups and the indices of the frames that were tiled.
+    """
+    units = []
+    for i, frame in frames.items():
+        units.append((i, frame, (0, 0)))
+        if policy.tiling:
+            units.extend((i, frame[y1:y2, x1:x2], (x1, y1)) for x1, y1, x2, y2 in make_tiles(frame.shape[:2]))
+
+    by_shape = defaultdict(list)
+    for unit in units:
+        by_shape[unit[1].shape[:2]].append(unit)
+    # Units whose shape no other unit shares, e.g. a batch of photos of different sizes, are
+    # letterboxed to a square together instead of being sent to the detectors one by one
+    batches = [shape_units for shape_units in by_shape.values() if len(shape_units) > 1]
+    singles = [shape_units[0] for shape_units in by_shape.values() if len(shape_units) == 1]
+    if singles:
+        batches.append(singles)
+
+    groups = [
+        (
+            [i for i, _, _ in shape_units],
+            [offset for _, _, offset in shape_units],
+            prepare_batch([crop for _, crop, _ in shape_units], policy.input_side(input_size), rect=True),
+        )
+        for shape_units in batches
+    ]
+    tiled = {i for i, count in Counter(i for i, _, _ in units).items() if count > 1}
+    return groups, tiled
+
+
+def _detect_units(
+        detector: Any,
+        name: str,
+        groups: List[_UnitGroup],
+        tiled: Set[int],
+        frames: List[int],
+) -> List[List[dict]]:
+    """
+    Runs a detector over the prepared units of the given frames, one call per unit shape.
+
+    :return: Detections of every frame in `frames` in frame coordinates, tiles merged.
+    """
+    wanted = set(frames)
+    found = defaultdict(list)
+    for owners, offsets, prepared in groups:
+        rows = [row for row, i in enumerate(owners) if i in wanted]
+        if not rows:
+            continue
+        with detector.lock, span("detect", model=name):
+            batch_results = detector.detect_batch(prepared.tensor[rows])
+        for row, batch_detections in zip(rows, batch_results):
+            x, y = offsets[row]
+            restored = restore_boxes(batch_detections, prepared.ratios[row], prepared.pads[row], prepared.shapes[row])
+            found[owners[row]].extend(
+                {**detection, 'box': (x1 + x, y1 + y, x2 + x, y2 + y)}
+                for detection in restored
+                for x1, y1, x2, y2 in [detection['box']]
+            )
+    return [merge_detections(found[i]) if i in tiled else found[i] for i in frames]
+
+
+@traced("model")
+def model_batch(
+        media: List[Any],
+        models_to_apply: List[str],
+        tier: Optional[str] = None,
+) -> List[List[dict[str, Any]]]:
+    """
+    Run selected models on several images, one batched call per model.
+
+    Detectors that declare the same `input_size` share one preprocessing pass: the frames are
+    letterboxed and converted to a tensor once, and the boxes are mapped back afterwards.
+    Frames of the same shape are letterboxed to a rectangle, and in the "accurate" tier large
+    images are also sliced into tiles whose detections are merged with NMS.
+    Detections of image arrays are cached by frame content, model identity and tier, so only the
+    frames a detector has not seen before are sent to it.
+
+    :param media: Images to process.
+    :param models_to_apply: List of model names.
+    :param tier: Latency/accuracy tier (see processing.inference_policy), INFERENCE_TIER if not given.
+    :return: List of detection results for every image, in the same order.
+    """
+    results = [[] for _ in media]
+    if not media:
+        return results
+
+    policy = get_policy(tier)
+    detectors_by_input = defaultdict(list)
+    names = {}
     for model in models_to_apply:
         try:
             detector = default_plugin_manager.get_detector(model)
-            results.extend(detector.detect(media))
+            detectors_by_input[detector.input_size].append(detector)
+            names[detector] = model
         except ValueError as e:
             print(f"Warning: {traceback.format_exc()}")
+
+    shareable = all(isinstance(item, np.ndarray) for item in media)
+    cacheable = shareable and detection_cache.enabled
+    frame_hashes = [content_hash(item) for item in media] if cacheable else None
+
+    for input_size, detectors in detectors_by_input.items():
+        detections_by_detector = {}
+        for detector in detectors:
+            if cacheable:
+                keys = [content_hash(detector.identity, policy.name, frame_hash) for frame_hash in frame_hashes]
+                detections_by_detector[detector] = [_from_cache(detection_cache.get(key)) for key in keys]
+            else:
+                detections_by_detector[detector] = [None] * len(media)
+
+        # Frames that at least one detector of the group still has to see
+        to_infer = sorted({
+            i for detections in detections_by_detector.values() for i, cached in enumerate(detections) if cached is None
+        })
+        groups = None
+        if to_infer and input_size and shareable:
+            groups, tiled = _prepare_units({i: media[i] for i in to_infer}, input_size, policy)
+
+        for detector, detections in detections_by_detector.items():
+            missing = [i for i, cached in enumerate(detections) if cached is None]
+            try:
+                if missing and groups is None:
+                    with detector.lock, span("detect", model=names[detector]):
+                        batch_results = detector.detect_batch([media[i] for i in missing])
+                elif missing:
+                    batch_results = _detect_units(detector, names[detector], groups, tiled, missing)
+                else:
+                    batch_results = []
+
+                for i, batch_detections in zip(missing, batch_results):
+                    detections[i] = batch_detections
+                    if cacheable:
+                        key = content_hash(detector.identity, policy.name, frame_hashes[i])
+                        detection_cache.set(key, batch_detections)
+
+                for image_results, image_detections in zip(results, detections):
+                    image_results.extend(image_detections or [])
+            except ValueError as e:
+                print(f"Warning: {traceback.format_exc()}")
     return results
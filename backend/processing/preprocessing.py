@@ -0,0 +1,124 @@
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from plugins_system.detectors.base_detector import DEVICE
+
+LETTERBOX_COLOR = (114, 114, 114)  # Padding color used by ultralytics
+
+
+class PreparedBatch(NamedTuple):
+    """
+    Frames letterboxed and converted to a model input tensor.
+
+    :ivar tensor: RGB float tensor of shape (B, 3, H, W) with values in [0, 1].
+    :ivar ratios: Resize ratio applied to every frame.
+    :ivar pads: Left and top padding added to every frame.
+    :ivar shapes: Original (height, width) of every frame.
+    """
+    tensor: torch.Tensor
+    ratios: List[float]
+    pads: List[Tuple[int, int]]
+    shapes: List[Tuple[int, int]]
+
+
+def rect_shape(shape: Tuple[int, int], size: int, stride: int = 32) -> Tuple[int, int]:
+    """
+    Smallest input that fits a frame resized to `size` on its longer side.
+
+    :param shape: (height, width) of the frame.
+    :param size: Longer side of the input.
+    :param stride: Both sides are rounded up to a multiple of it.
+    :return: (height, width) of the input.
+    """
+    h, w = shape
+    ratio = size / max(h, w)
+    return (
+        min(math.ceil(round(h * ratio) / stride) * stride, size),
+        min(math.ceil(round(w * ratio) / stride) * stride, size),
+    )
+
+
+def letterbox(
+        img: np.ndarray,
+        size: int,
+        shape: Optional[Tuple[int, int]] = None,
+) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Resize an image keeping its aspect ratio and pad it to the input shape.
+
+    :param img: BGR image.
+    :param size: Side of the output square.
+    :param shape: (height, width) of the output instead of the square.
+    :return: Padded image, resize ratio and (left, top) padding.
+    """
+    h, w = img.shape[:2]
+    out_h, out_w = shape or (size, size)
+    ratio = min(out_h / h, out_w / w)
+    new_w, new_h = round(w * ratio), round(h * ratio)
+    if (new_w, new_h) != (w, h):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    dw, dh = (out_w - new_w) / 2, (out_h - new_h) / 2
+    top, bottom = round(dh - 0.1), round(dh + 0.1)
+    left, right = round(dw - 0.1), round(dw + 0.1)
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+    return img, ratio, (left, top)
+
+
+def prepare_batch(images: List[np.ndarray], size: int, rect: bool = False) -> PreparedBatch:
+    """
+    Letterbox BGR frames and stack them into one input tensor on the detectors' device.
+
+    :param images: BGR frames.
+    :param size: Model input side.
+    :param rect: If all frames have the same shape, pad them to the smallest rectangle
+                 (see `rect_shape`) instead of a square, which saves compute on wide video.
+    :return: Prepared batch.
+    """
+    shapes = [img.shape[:2] for img in images]
+    target = rect_shape(shapes[0], size) if rect and shapes and len(set(shapes)) == 1 else None
+
+    padded, ratios, pads = [], [], []
+    for img in images:
+        img, ratio, pad = letterbox(img, size, target)
+        padded.append(img)
+        ratios.append(ratio)
+        pads.append(pad)
+
+    batch = np.ascontiguousarray(np.stack(padded)[..., ::-1].transpose(0, 3, 1, 2))  # BGR to RGB, BHWC to BCHW
+    tensor = torch.from_numpy(batch).to(DEVICE).float() / 255.0
+    return PreparedBatch(tensor, ratios, pads, shapes)
+
+
+def restore_boxes(
+        detections: List[Dict[str, Any]],
+        ratio: float,
+        pad: Tuple[int, int],
+        shape: Tuple[int, int],
+) -> List[Dict[str, Any]]:
+    """
+    Map boxes from letterboxed input coordinates back to the original frame.
+
+    :param detections: Detections in letterboxed coordinates.
+    :param ratio: Resize ratio used by `letterbox`.
+    :param pad: (left, top) padding used by `letterbox`.
+    :param shape: Original (height, width) of the frame.
+    :return: Detections in original frame coordinates.
+    """
+    h, w = shape
+    left, top = pad
+    restored = []
+    for detection in detections:
+        x1, y1, x2, y2 = detection['box']
+        box = (
+            int(min(max((x1 - left) / ratio, 0), w)),
+            int(min(max((y1 - top) / ratio, 0), h)),
+            int(min(max((x2 - left) / ratio, 0), w)),
+            int(min(max((y2 - top) / ratio, 0), h)),
+        )
+        restored.append({**detection, 'box': box})
+    return restored
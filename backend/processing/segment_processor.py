@@ -0,0 +1,200 @@
+import glob
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+import cv2
+from backend_config import VIDEO_SEGMENT_WORKERS, VIDEO_SEGMENT_SECONDS
+from imageio_ffmpeg import get_ffmpeg_exe
+from utils import FRAMES_PROCESSED, record_spans, replay_spans, write_video
+from utils.tracing import SpanRecord
+
+from .video_processor import process_video
+
+
+def _run_ffmpeg(command: List[str]) -> None:
+    result = subprocess.run([get_ffmpeg_exe(), "-y", "-loglevel", "error"] + command,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors="replace"))
+
+
+def split_video(input_path: str, output_dir: str, segment_seconds: int = VIDEO_SEGMENT_SECONDS) -> List[str]:
+    """
+    Split the video stream into segments without re-encoding.
+
+    ffmpeg can only cut a stream copy at keyframes, so every segment starts with a keyframe
+    and can be decoded on its own.
+
+    :param input_path: Path to input video.
+    :param output_dir: Directory for the segments.
+    :param segment_seconds: Target segment length.
+    :return: Paths to the segments in playback order.
+    """
+    pattern = os.path.join(output_dir, "segment_%05d.mp4")
+    _run_ffmpeg([
+        "-i", input_path, "-map", "0:v:0", "-c", "copy",
+        "-f", "segment", "-segment_time", str(segment_seconds), "-reset_timestamps", "1",
+        pattern,
+    ])
+    return sorted(glob.glob(os.path.join(output_dir, "segment_*.mp4")))
+
+
+def concat_videos(segment_paths: List[str], output_path: str) -> None:
+    """
+    Join encoded segments with the concat demuxer, without re-encoding the seams.
+
+    :param segment_paths: Paths to the segments in playback order.
+    :param output_path: Path of the joined video.
+    """
+    list_path = f"{output_path}.txt"
+    with open(list_path, "w") as list_file:
+        for path in segment_paths:
+            list_file.write(f"file '{os.path.abspath(path)}'\n")
+    try:
+        _run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path])
+    finally:
+        os.remove(list_path)
+
+
+def _init_worker(threads: int) -> None:
+    """
+    Share the CPU cores between the workers instead of letting each of them use all of them.
+    """
+    import torch
+
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+
+
+# Worker processes are kept between videos, so torch and the models are loaded only once per worker
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the shared pool of segment workers, created on first use.
+
+    :param workers: Number of worker processes; the pool is recreated if it differs.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            threads = max((os.cpu_count() or 1) // workers, 1)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads,),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def _drop_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Forgets a broken pool (e.g. a worker was killed), the next call creates a new one.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _process_segment(
+        segment_path: str,
+        output_path: str,
+        black_list: List[str],
+        models_to_apply: List[str],
+        pixelation: bool,
+        style: Optional[str],
+        tier: Optional[str],
+) -> Tuple[str, List[SpanRecord], int]:
+    """
+    Censor one segment in a worker process.
+
+    The worker loads its own detectors, and tracking starts over at the first frame of the segment.
+    Metrics of the worker never reach the API, so its spans and frame count are returned to the parent.
+
+    :return: Output path, the recorded spans and the number of censored frames.
+    """
+    frames_count = 0
+
+    def counted(frames):
+        nonlocal frames_count
+        for frame in frames:
+            frames_count += 1
+            yield frame
+
+    with record_spans() as spans:
+        frames, fps = process_video(segment_path, black_list, models_to_apply, pixelation, style, tier)
+        write_video(counted(frames), output_path, fps)
+    return output_path, spans, frames_count
+
+
+def process_video_segments(
+        input_path: str,
+        output_path: str,
+        black_list: List[str],
+        models_to_apply: List[str],
+        pixelation: bool = True,
+        style: Optional[str] = None,
+        tier: Optional[str] = None,
+        workers: int = VIDEO_SEGMENT_WORKERS,
+        segment_seconds: int = VIDEO_SEGMENT_SECONDS,
+) -> str:
+    """
+    Process a video split into segments in a pool of processes.
+
+    :param input_path: Path to input video.
+    :param output_path: Path of the censored video (without audio).
+    :param black_list: List of class names to censor.
+    :param models_to_apply: Models to use.
+    :param pixelation: Apply pixelation if True, else draw boxes.
+    :param style: Censor style (see utils.CENSOR_STYLES), overrides `pixelation`.
+    :param tier: Latency/accuracy tier of the detectors (see processing.inference_policy).
+    :param workers: Number of worker processes of the shared pool.
+    :param segment_seconds: Target segment length.
+    :return: Path of the censored video.
+    """
+    try:
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as segments_dir:
+            segments = split_video(input_path, segments_dir, segment_seconds)
+            if not segments:
+                raise ValueError(f"Failed to split video {input_path}")
+
+            outputs = [f"{os.path.splitext(segment)[0]}_censor.mp4" for segment in segments]
+            executor = _get_pool(max(workers, 1))
+            futures = [
+                executor.submit(_process_segment, segment, output, black_list, models_to_apply, pixelation, style, tier)
+                for segment, output in zip(segments, outputs)
+            ]
+            try:
+                for future in futures:
+                    _, spans, frames_count = future.result()
+                    replay_spans(spans)
+                    FRAMES_PROCESSED.inc(frames_count)
+            except BrokenProcessPool:
+                _drop_pool(executor)
+                raise
+            finally:
+                for future in futures:
+                    future.cancel()
+
+            concat_videos(outputs, output_path)
+        return output_path
+    except Exception as e:
+        tb_str = traceback.format_exc()
+        raise RuntimeError(f"Error processing video segments:\n{tb_str}")
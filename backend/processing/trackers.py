@@ -0,0 +1,164 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple, Type
+
+import cv2
+import numpy as np
+from backend_config import TRACKER_BACKEND, TRACKER_FLOW_MAX_SIDE
+
+Box = Tuple[int, int, int, int]  # x1, y1, x2, y2
+
+
+class BaseTracker(ABC):
+    """
+    Follows a set of boxes from the keyframe where they were detected to the next frames.
+    """
+
+    @abstractmethod
+    def init(self, frame: np.ndarray, boxes: List[Box]) -> None:
+        """
+        Starts tracking the boxes.
+
+        :param frame: Keyframe the boxes were detected on.
+        :param boxes: Boxes to track.
+        """
+        pass
+
+    @abstractmethod
+    def update(self, frame: np.ndarray) -> Tuple[bool, List[Box]]:
+        """
+        Moves the boxes to the next frame.
+
+        :param frame: Next frame.
+        :return: False if at least one box was lost, and the boxes in the same order as in `init`.
+        """
+        pass
+
+
+class CSRTTracker(BaseTracker):
+    """
+    OpenCV CSRT tracker for every box. Accurate, but slow, and its cost grows with the number of boxes.
+    """
+
+    def __init__(self):
+        self.__trackers = cv2.legacy.MultiTracker_create()
+
+    def init(self, frame: np.ndarray, boxes: List[Box]) -> None:
+        self.__trackers = cv2.legacy.MultiTracker_create()
+        for x1, y1, x2, y2 in boxes:
+            self.__trackers.add(cv2.legacy.TrackerCSRT_create(), frame, (x1, y1, x2 - x1, y2 - y1))
+
+    def update(self, frame: np.ndarray) -> Tuple[bool, List[Box]]:
+        success, boxes = self.__trackers.update(frame)
+        result = []
+        for box in boxes:
+            x, y, w, h = map(int, box)
+            result.append((x, y, x + w, y + h))
+        return success, result
+
+
+class OpticalFlowTracker(BaseTracker):
+    """
+    Sparse Lucas-Kanade optical flow on downscaled grayscale frames.
+
+    Corner points are seeded inside every box and tracked all together in one call; each box is
+    shifted by the median motion of its points. A box is lost when too few of its points survive,
+    then it keeps its last position and is seeded again.
+    """
+
+    def __init__(self, max_side: int = TRACKER_FLOW_MAX_SIDE, points_per_box: int = 20, min_points: int = 3):
+        self.__max_side = max_side
+        self.__points_per_box = points_per_box
+        self.__min_points = min_points
+        self.__scale = 1.0
+        self.__prev_gray = None
+        self.__boxes = np.empty((0, 4), dtype=np.float32)
+        self.__points = np.empty((0, 1, 2), dtype=np.float32)
+        self.__owners = np.empty(0, dtype=np.int32)
+
+    def init(self, frame: np.ndarray, boxes: List[Box]) -> None:
+        self.__scale = min(1.0, self.__max_side / max(frame.shape[:2]))
+        self.__prev_gray = self.__prepare(frame)
+        self.__boxes = np.array(boxes, dtype=np.float32).reshape(-1, 4) * self.__scale
+        self.__points = np.empty((0, 1, 2), dtype=np.float32)
+        self.__owners = np.empty(0, dtype=np.int32)
+        self.__seed(range(len(self.__boxes)))
+
+    def update(self, frame: np.ndarray) -> Tuple[bool, List[Box]]:
+        gray = self.__prepare(frame)
+        success = True
+
+        if len(self.__points):
+            next_points, status, _ = cv2.calcOpticalFlowPyrLK(
+                self.__prev_gray, gray, self.__points, None, winSize=(15, 15), maxLevel=2
+            )
+            good = status.reshape(-1) == 1
+            shifts = (next_points - self.__points).reshape(-1, 2)
+            for i in range(len(self.__boxes)):
+                box_points = good & (self.__owners == i)
+                if np.count_nonzero(box_points) >= self.__min_points:
+                    dx, dy = np.median(shifts[box_points], axis=0)
+                    self.__boxes[i] += (dx, dy, dx, dy)
+                else:
+                    success = False
+            self.__points, self.__owners = next_points[good], self.__owners[good]
+        elif len(self.__boxes):
+            success = False
+
+        self.__prev_gray = gray
+        counts = np.bincount(self.__owners, minlength=len(self.__boxes))
+        self.__seed(np.flatnonzero(counts < self.__min_points))
+
+        boxes = np.round(self.__boxes / self.__scale).astype(int)
+        return success, [tuple(box) for box in boxes.tolist()]
+
+    def __prepare(self, frame: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.__scale < 1.0:
+            gray = cv2.resize(gray, None, fx=self.__scale, fy=self.__scale, interpolation=cv2.INTER_AREA)
+        return gray
+
+    def __seed(self, box_indices) -> None:
+        """
+        Replaces the points of the given boxes with fresh corners found inside them.
+        """
+        h, w = self.__prev_gray.shape[:2]
+        box_indices = list(box_indices)
+        if not box_indices:
+            return
+
+        keep = ~np.isin(self.__owners, box_indices)
+        points, owners = [self.__points[keep]], [self.__owners[keep]]
+        for i in box_indices:
+            x1, y1, x2, y2 = np.round(self.__boxes[i]).astype(int)
+            x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+            if x2 - x1 < 2 or y2 - y1 < 2:
+                continue
+
+            corners = cv2.goodFeaturesToTrack(
+                self.__prev_gray[y1:y2, x1:x2], maxCorners=self.__points_per_box, qualityLevel=0.01, minDistance=3
+            )
+            if corners is None:  # flat region, fall back to a regular grid
+                xs, ys = np.meshgrid(np.linspace(0, x2 - x1 - 1, 3), np.linspace(0, y2 - y1 - 1, 3))
+                corners = np.stack([xs.ravel(), ys.ravel()], axis=1)
+            corners = corners.reshape(-1, 1, 2).astype(np.float32) + np.float32([x1, y1])
+            points.append(corners)
+            owners.append(np.full(len(corners), i, dtype=np.int32))
+
+        self.__points = np.concatenate(points).astype(np.float32)
+        self.__owners = np.concatenate(owners)
+
+
+TRACKERS: Dict[str, Type[BaseTracker]] = {
+    "csrt": CSRTTracker,
+    "optical_flow": OpticalFlowTracker,
+}
+
+
+def create_tracker(name: str = TRACKER_BACKEND) -> BaseTracker:
+    """
+    :param name: Tracker backend name, one of `TRACKERS`.
+    :return: New tracker instance.
+    """
+    if name not in TRACKERS:
+        raise ValueError(f"Unknown tracker backend '{name}', expected one of {list(TRACKERS)}")
+    return TRACKERS[name]()
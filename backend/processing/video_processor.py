@@ -1,10 +1,181 @@
+import contextvars
+import queue
+import threading
 import traceback
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 import cv2
-from utils import pixelation_box, draw_box
+import numpy as np
+from backend_config import VIDEO_FRAME_BUFFER_SIZE, VIDEO_KEYFRAME_BATCH_SIZE, VIDEO_MAX_WINDOW_FRAMES
+from utils import FRAMES_PROCESSED, render_censor, resolve_style, span
 
-from .model import model
+from .keyframe_scheduler import KeyframeScheduler
+from .model import model, model_batch
+from .trackers import create_tracker
+
+_END_OF_STREAM = object()
+
+
+def read_frames(cap: cv2.VideoCapture, buffer_size: int = VIDEO_FRAME_BUFFER_SIZE) -> Iterator[np.ndarray]:
+    """
+    Decode frames in a background thread and yield them one by one.
+
+    At most `buffer_size` decoded frames are kept in memory, so decoding can run ahead of
+    the censoring loop without the memory footprint depending on the clip length.
+
+    :param cap: Opened video capture.
+    :param buffer_size: Maximum number of decoded frames waiting to be processed.
+    :return: Iterator over decoded BGR frames.
+    """
+    frames_queue = queue.Queue(maxsize=max(buffer_size, 1))
+    stop_event = threading.Event()
+
+    def put(item) -> None:
+        # Gives up once the consumer has stopped, so a full queue can't block the thread forever
+        while not stop_event.is_set():
+            try:
+                frames_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def decode() -> None:
+        try:
+            while not stop_event.is_set():
+                with span("video.decode"):
+                    ret, frame = cap.read()
+                put(frame if ret else _END_OF_STREAM)
+                if not ret:
+                    break
+        except Exception as e:
+            put(e)
+
+    # The decoder runs in a copy of the context, so its time counts towards the current job
+    decoder = threading.Thread(target=contextvars.copy_context().run, args=(decode,), daemon=True)
+    decoder.start()
+    try:
+        while True:
+            item = frames_queue.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop_event.set()
+        decoder.join()
+        cap.release()
+
+
+def _censor_window(
+        frames: List[np.ndarray],
+        keyframe_flags: List[bool],
+        black_list: List[str],
+        models_to_apply: List[str],
+        scheduler: KeyframeScheduler,
+        style: str = "pixelate",
+        tier: Optional[str] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Censor a window of frames that starts with a keyframe.
+
+    All keyframes of the window are sent to the detectors in one batch, then the frames are
+    walked in order: keyframes use their own detections, the others follow them with a tracker.
+    When the tracker loses a box, the frame is detected again on the spot.
+
+    :param frames: Decoded frames of the window.
+    :param keyframe_flags: Whether the frame with the same index is a keyframe.
+    :param black_list: List of class names to censor.
+    :param models_to_apply: Models to use.
+    :param scheduler: Keyframe scheduler of the video, notified about tracker failures.
+    :param style: Censor style (see utils.CENSOR_STYLES).
+    :param tier: Latency/accuracy tier of the detectors (see processing.inference_policy).
+    :return: Iterator over censored frames.
+    """
+    keyframes = [frame for frame, is_keyframe in zip(frames, keyframe_flags) if is_keyframe]
+    keyframe_results = iter(model_batch(keyframes, models_to_apply, tier))
+
+    tracked_class_names = []
+    since_detection = 0
+    for frame, is_keyframe in zip(frames, keyframe_flags):
+        redetect = False
+        if not is_keyframe:
+            with span("video.track"):
+                success, boxes = tracker.update(frame)
+            since_detection += 1
+            # A lost box is re-detected right away, but not more often than the scheduler's minimal interval
+            redetect = not success and since_detection >= scheduler.min_interval
+            if redetect:
+                scheduler.report_tracker_failure()
+
+        if is_keyframe or redetect:
+            results = next(keyframe_results) if is_keyframe else model(frame, models_to_apply, tier)
+            tracked_class_names.clear()
+            boxes = []
+
+            for result in results:
+                class_name = result['class']
+                if class_name in black_list:
+                    boxes.append(result['box'])
+                    tracked_class_names.append(class_name)
+
+            tracker = create_tracker()
+            tracker.init(frame, boxes)
+            since_detection = 0
+
+        with span("video.render"):
+            render_censor(frame, boxes, tracked_class_names, style)
+
+        FRAMES_PROCESSED.inc()
+        yield frame
+
+
+def _censor_frames(
+        cap: cv2.VideoCapture,
+        fps: int,
+        black_list: List[str],
+        models_to_apply: List[str],
+        style: str = "pixelate",
+        tier: Optional[str] = None,
+        batch_size: int = VIDEO_KEYFRAME_BATCH_SIZE,
+) -> Iterator[np.ndarray]:
+    """
+    Detect, track and censor regions frame by frame.
+
+    Keyframes are chosen by `KeyframeScheduler` from scene changes and motion, and frames are
+    grouped into windows of up to `batch_size` keyframes so the detectors can process the keyframes
+    of a window in one call. A window is closed early at the first keyframe after
+    VIDEO_MAX_WINDOW_FRAMES frames.
+
+    :param cap: Opened video capture.
+    :param fps: FPS of the video.
+    :param black_list: List of class names to censor.
+    :param models_to_apply: Models to use.
+    :param style: Censor style (see utils.CENSOR_STYLES).
+    :param tier: Latency/accuracy tier of the detectors (see processing.inference_policy).
+    :param batch_size: Number of keyframes per detection batch.
+    :return: Iterator over censored frames.
+    """
+    try:
+        scheduler = KeyframeScheduler(fps)
+        filtered_models = [m for m in models_to_apply if m != "bad_words_detector"]
+
+        window, keyframe_flags, keyframes = [], [], 0
+        for frame in read_frames(cap):
+            is_keyframe = scheduler.is_keyframe(frame)
+            if is_keyframe and (keyframes >= max(batch_size, 1) or len(window) >= VIDEO_MAX_WINDOW_FRAMES):
+                yield from _censor_window(window, keyframe_flags, black_list, filtered_models, scheduler, style, tier)
+                window, keyframe_flags, keyframes = [], [], 0
+
+            window.append(frame)
+            keyframe_flags.append(is_keyframe)
+            keyframes += is_keyframe
+
+        yield from _censor_window(window, keyframe_flags, black_list, filtered_models, scheduler, style, tier)
+        print(f"Keyframe stats: {scheduler.stats()}")
+    except Exception as e:
+        tb_str = traceback.format_exc()
+        raise RuntimeError(f"Error processing video:\n{tb_str}")
 
 
 def process_video(
@@ -12,14 +183,22 @@ def process_video(
         black_list: List[str],
         models_to_apply: List[str],
         pixelation: bool = True,
-) -> Optional[List[any]]:
+        style: Optional[str] = None,
+        tier: Optional[str] = None,
+) -> Tuple[Iterator[np.ndarray], int]:
     """
     Process a video: detect and censor regions in frames.
 
+    Frames are decoded, censored and handed out one at a time, so the caller can encode them
+    as they come instead of keeping the whole clip in memory.
+
     :param input_path: Path to input video.
     :param black_list: List of class names to censor.
     :param models_to_apply: Models to use.
     :param pixelation: Apply pixelation if True, else draw boxes.
+    :param style: Censor style (see utils.CENSOR_STYLES), overrides `pixelation`.
+    :param tier: Latency/accuracy tier of the detectors (see processing.inference_policy).
+    :return: Iterator over censored frames and the FPS of the video.
     """
     try:
         cap = cv2.VideoCapture(input_path)
@@ -27,53 +206,9 @@ def process_video(
             raise ValueError(f"Failed to open video {input_path}")
 
         fps = int(cap.get(cv2.CAP_PROP_FPS))
-        frames = []
-
-        tracked_class_names = []
-        frame_count = 0
-        tracking_interval = max(fps // 2, 1)
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            if frame_count % tracking_interval == 0:
-                filtered_models = [m for m in models_to_apply if m != "bad_words_detector"]
-                results = model(frame, filtered_models)
-                trackers = cv2.legacy.MultiTracker_create()
-                tracked_class_names.clear()
-
-                for result in results:
-                    class_name = result['class']
-                    x1, y1, x2, y2 = result['box']
-                    if class_name in black_list:
-                        if pixelation:
-                            pixelation_box(frame, x1, y1, x2, y2)
-                        else:
-                            draw_box(frame, x1, y1, x2, y2, class_name)
-
-                        tracker = cv2.legacy.TrackerCSRT_create()
-                        trackers.add(tracker, frame, (x1, y1, x2 - x1, y2 - y1))
-                        tracked_class_names.append(class_name)
-            else:
-                success, boxes = trackers.update(frame)
-                for i, newbox in enumerate(boxes):
-                    class_name = tracked_class_names[i] if i < len(tracked_class_names) else "Tracked"
-                    x, y, w, h = map(int, newbox)
-                    if class_name in black_list:
-                        if pixelation:
-                            pixelation_box(frame, x, y, x + w, y + h)
-                        else:
-                            draw_box(frame, x, y, x + w, y + h, class_name)
-
-            frames.append(frame)
-            del frame
-            frame_count += 1
-
-        cap.release()
-        return frames, fps
+        style = resolve_style(pixelation, style)
     except Exception as e:
         tb_str = traceback.format_exc()
         raise RuntimeError(f"Error processing video:\n{tb_str}")
-        return None
+
+    return _censor_frames(cap, fps, black_list, models_to_apply, style, tier), fps
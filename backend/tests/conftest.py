@@ -0,0 +1,58 @@
+import os
+import socket
+import sys
+import uuid
+
+import pytest
+
+# Tests run from the backend directory layout, like the scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# utils.minio_manager builds its module-level client from these when imported
+os.environ.setdefault("MINIO_ENDPOINT", "localhost:9000")
+os.environ.setdefault("MINIO_ACCESS_KEY", "test")
+os.environ.setdefault("MINIO_SECRET_KEY", "testtest")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def s3_endpoint():
+    """
+    S3 endpoint for the MinIO tests: MINIO_TEST_ENDPOINT (e.g. a local MinIO container, keys in
+    MINIO_TEST_ACCESS_KEY/MINIO_TEST_SECRET_KEY), otherwise an in-process moto server.
+    """
+    endpoint = os.getenv("MINIO_TEST_ENDPOINT")
+    if endpoint:
+        yield endpoint, os.getenv("MINIO_TEST_ACCESS_KEY", "minio"), os.getenv("MINIO_TEST_SECRET_KEY", "minio123")
+        return
+
+    moto_server = pytest.importorskip("moto.server", reason="needs MINIO_TEST_ENDPOINT or moto[server]")
+    port = _free_port()
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    try:
+        yield f"127.0.0.1:{port}", "test", "testtest"
+    finally:
+        server.stop()
+
+
+@pytest.fixture
+def minio(s3_endpoint):
+    from utils.minio_manager import MinIOClient
+
+    endpoint, access_key, secret_key = s3_endpoint
+    return MinIOClient(endpoint, access_key, secret_key, secure=False)
+
+
+@pytest.fixture
+def bucket(minio):
+    name = f"test-{uuid.uuid4().hex[:12]}"
+    minio.ensure_bucket(name)
+    yield name
+    minio.clear(name)
+    minio.client.remove_bucket(name)
@@ -0,0 +1,34 @@
+import pytest
+
+from plugins_system.profanity.lexicon import ProfanityLexicon, Verdict
+
+lexicon = ProfanityLexicon()
+
+PROFANE = [
+    "ебать", "ебу", "ебёшь", "ебешь", "ебет", "ебём", "ебут", "ебал", "ебало", "ебаный", "ебанутый",
+    "ебучий", "ебический", "ебло", "ебля", "ебырь", "ебись", "ебень",
+    "заебал", "заёбывать", "наебать", "наёбывать", "наебка", "выебон", "выёбываться", "разъебай",
+    "съебаться", "въебать", "уебок", "отъебись", "долбоеб", "поебень",
+    "хуй", "хуево", "пизда", "распиздяй", "блядь", "мудак", "залупа", "пидорас", "шлюха", "сука", "дрочить",
+]
+
+CLEAN = [
+    "себастьян", "себе", "себя", "вебинар", "небо", "тебе", "хлеб", "погреб", "колебаться", "учебник",
+    "победа", "команда", "скипидар", "небанальный", "употреблять", "корабля", "мандарин", "страхуй",
+    "педикюр", "бляшка",
+]
+
+
+@pytest.mark.parametrize("word", PROFANE)
+def test_obscene_inflections_are_profane(word):
+    assert lexicon.classify(word) == Verdict.PROFANE
+
+
+@pytest.mark.parametrize("word", CLEAN)
+def test_normal_words_are_clean(word):
+    assert lexicon.classify(word) == Verdict.CLEAN
+
+
+@pytest.mark.parametrize("word", ["заебцовый", "ебщик", "психуй"])
+def test_unknown_endings_are_left_to_the_llm(word):
+    assert lexicon.classify(word) == Verdict.UNKNOWN
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+PART_SIZE = 5 * 1024 * 1024  # the smallest part S3 accepts
+
+
+def _read(minio, bucket, key) -> bytes:
+    return b"".join(minio.stream_object(bucket, key))
+
+
+def _pending_uploads(minio, bucket) -> list:
+    return minio.client._list_multipart_uploads(bucket).uploads
+
+
+def test_small_data_is_uploaded_with_a_single_put(minio, bucket):
+    key = minio.upload_stream(bucket, "small.bin", [b"abc", b"", b"def"], part_size=PART_SIZE)
+
+    assert key.endswith("_small.bin")
+    assert minio.original_name(key) == "small.bin"
+    assert _read(minio, bucket, key) == b"abcdef"
+    assert not _pending_uploads(minio, bucket)
+
+
+def test_large_data_is_uploaded_in_parallel_parts(minio, bucket):
+    data = os.urandom(2 * PART_SIZE + 12345)
+    chunks = [data[i:i + 777_777] for i in range(0, len(data), 777_777)]
+
+    key = minio.upload_stream(bucket, "large.mp4", chunks, part_size=PART_SIZE, workers=2)
+
+    assert _read(minio, bucket, key) == data
+    assert minio.client.stat_object(bucket, key).content_type == "video/mp4"
+    assert not _pending_uploads(minio, bucket)
+
+
+def test_failed_stream_aborts_the_multipart_upload(minio, bucket):
+    def chunks():
+        yield os.urandom(PART_SIZE)
+        yield os.urandom(PART_SIZE)
+        raise RuntimeError("encoder failed")
+
+    with pytest.raises(RuntimeError, match="encoder failed"):
+        minio.upload_stream(bucket, "broken.mp4", chunks(), part_size=PART_SIZE, workers=2)
+
+    assert list(minio.client.list_objects(bucket, recursive=True)) == []
+    assert not _pending_uploads(minio, bucket)
+
+
+def test_stream_object_reads_ranges(minio, bucket):
+    data = bytes(range(256)) * 100
+    key = minio.upload_stream(bucket, "range.bin", [data])
+
+    assert b"".join(minio.stream_object(bucket, key, offset=1000, length=500, chunk_size=64)) == data[1000:1500]
+    assert b"".join(minio.stream_object(bucket, key, offset=25000)) == data[25000:]
+
+
+def test_file_exists(minio, bucket):
+    key = minio.upload_stream(bucket, "exists.bin", [b"x"])
+
+    assert minio.file_exists(bucket, key)
+    assert not minio.file_exists(bucket, f"missing-{key}")
@@ -0,0 +1,9 @@
+from benchmarks.video_memory import measure
+
+# Keeping the 180 extra 720p frames of the longer clip in memory would take about 500 MB
+MAX_GROWTH_MB = 100
+
+
+def test_peak_rss_does_not_grow_with_clip_length():
+    short_clip, long_clip = measure([2, 8])
+    assert long_clip["peak_rss_mb"] - short_clip["peak_rss_mb"] < MAX_GROWTH_MB, (short_clip, long_clip)
@@ -1,15 +1,43 @@
+from .audio_censor import censor_audio
+from .censor_renderer import CENSOR_STYLES, merge_boxes, render_censor, resolve_style
+from .detection_cache import DetectionCache, content_hash, detection_cache, file_hash
 from .drawing_utils import pixelation_box, draw_box, get_color
-from .minio_manager import minio_client
+from .ffmpeg_writer import FFmpegVideoWriter, write_video
+from .minio_manager import minio_client, set_span as set_minio_span
 from .temp_file_manager import TempFilesManager
-from .video_audio_tools import extract_audio, add_audio_to_video, audio_format_transcoder, extract_audio
+from .tracing import FRAMES_PROCESSED, JOBS, JOB_SECONDS, QUEUE_DEPTH, collect_timings, record_spans, \
+    replay_spans, span, traced
+from .video_audio_tools import has_audio_track, iter_pcm_chunks, mux_audio_video
+
+# The MinIO client is shared with the frontend, so it gets the backend's tracing from here
+set_minio_span(span)
 
 __all__ = [
-    "extract_audio",
-    "add_audio_to_video",
-    "audio_format_transcoder",
-    "extract_audio",
+    "censor_audio",
+    "has_audio_track",
+    "iter_pcm_chunks",
+    "mux_audio_video",
     "TempFilesManager",
+    "FFmpegVideoWriter",
+    "write_video",
     "pixelation_box",
+    "render_censor",
+    "resolve_style",
+    "merge_boxes",
+    "CENSOR_STYLES",
     "get_color",
-    "minio_client"
+    "DetectionCache",
+    "detection_cache",
+    "content_hash",
+    "file_hash",
+    "minio_client",
+    "record_spans",
+    "replay_spans",
+    "span",
+    "traced",
+    "collect_timings",
+    "FRAMES_PROCESSED",
+    "JOBS",
+    "JOB_SECONDS",
+    "QUEUE_DEPTH",
 ]
@@ -0,0 +1,63 @@
+import os
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from .tracing import traced
+
+CENSOR_TONE_HZ = 1000  # Beep used when the censor sound file is missing
+
+
+@lru_cache(maxsize=16)
+def _censor_samples(censor_sound: str, frame_rate: int, channels: int, sample_width: int) -> np.ndarray:
+    """
+    Loads the censor sound converted to the given format, once per format.
+
+    :return: Read-only array of samples with shape (samples, channels).
+    """
+    if os.path.exists(censor_sound):
+        sound = AudioSegment.from_file(censor_sound)
+    else:
+        print(f"Warning: censor sound {censor_sound} not found, using a {CENSOR_TONE_HZ} Hz tone")
+        sound = Sine(CENSOR_TONE_HZ, sample_rate=frame_rate).to_audio_segment(duration=1000, volume=-10)
+
+    sound = sound.set_sample_width(sample_width).set_frame_rate(frame_rate).set_channels(channels)
+    samples = np.array(sound.get_array_of_samples()).reshape(-1, channels)
+    samples.setflags(write=False)
+    return samples
+
+
+@traced("audio.censor")
+def censor_audio(
+        audio: AudioSegment,
+        profanity_timestamps: List[Dict[str, float]],
+        censor_sound: str,
+) -> AudioSegment:
+    """
+    Replaces the given time ranges of the audio with the censor sound.
+
+    All ranges are overwritten in place in one array of samples, so the cost grows with
+    the length of the audio, not with the number of ranges.
+
+    :param audio: Audio to censor.
+    :param profanity_timestamps: Ranges to censor, dictionaries with "start" and "end" in seconds.
+    :param censor_sound: Path to the censor sound; a tone is generated if the file is missing.
+    :return: Censored audio in the format of the original.
+    """
+    if not profanity_timestamps:
+        return audio
+
+    channels, frame_rate = audio.channels, audio.frame_rate
+    samples = np.array(audio.get_array_of_samples()).reshape(-1, channels)
+    beep = _censor_samples(censor_sound, frame_rate, channels, audio.sample_width)
+
+    for item in profanity_timestamps:
+        start = min(max(int(item["start"] * frame_rate), 0), len(samples))
+        end = min(max(int(item["end"] * frame_rate), start), len(samples))
+        # Every range starts the beep from the beginning, repeating it if the word is longer
+        samples[start:end] = beep[np.arange(end - start) % len(beep)]
+
+    return audio._spawn(samples.tobytes())
@@ -0,0 +1,115 @@
+from typing import Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .drawing_utils import draw_box
+
+CENSOR_STYLES = ("pixelate", "blur", "fill", "box")
+FILL_COLOR = (0, 0, 0)
+
+
+def resolve_style(pixelation: bool = True, style: Optional[str] = None) -> str:
+    """
+    Combine the legacy `pixelation` flag with an explicit style.
+
+    :param pixelation: Pixelate if True, else draw boxes (used when no style is given).
+    :param style: One of CENSOR_STYLES or None.
+    :return: The censor style to use.
+    """
+    if style is None:
+        return "pixelate" if pixelation else "box"
+    if style not in CENSOR_STYLES:
+        raise ValueError(f"Unknown censor style '{style}', expected one of {list(CENSOR_STYLES)}")
+    return style
+
+
+def merge_boxes(boxes: np.ndarray) -> np.ndarray:
+    """
+    Replace every group of overlapping boxes with their bounding box.
+
+    :param boxes: Array of shape (N, 4) with x1, y1, x2, y2.
+    :return: Array of shape (M, 4) of non-overlapping boxes, M <= N.
+    """
+    while len(boxes) > 1:
+        x1, y1, x2, y2 = (boxes[:, i] for i in range(4))
+        overlap = (
+                (x1[:, None] < x2[None, :]) & (x1[None, :] < x2[:, None]) &
+                (y1[:, None] < y2[None, :]) & (y1[None, :] < y2[:, None])
+        )
+        # Label connected components by propagating the smallest index through the overlap graph
+        labels = np.arange(len(boxes))
+        while True:
+            new_labels = np.where(overlap, labels[None, :], len(boxes)).min(axis=1)
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+        if len(np.unique(labels)) == len(boxes):
+            break
+
+        groups = np.unique(labels)
+        boxes = np.stack([
+            np.concatenate([boxes[labels == g, :2].min(axis=0), boxes[labels == g, 2:].max(axis=0)])
+            for g in groups
+        ])
+    return boxes
+
+
+def render_censor(
+        img: np.ndarray,
+        boxes: np.ndarray,
+        labels: Sequence[str] = (),
+        style: str = "pixelate",
+        padding: int = 5,
+) -> None:
+    """
+    Censor all boxes of an image in place.
+
+    Boxes are padded and clipped as one array, overlapping ones are merged, and every resulting
+    region gets the effect once.
+
+    :param img: BGR image.
+    :param boxes: Array-like of shape (N, 4) with x1, y1, x2, y2.
+    :param labels: Class names of the boxes, used by the "box" style.
+    :param style: One of CENSOR_STYLES.
+    :param padding: Margin added around every box.
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    if not len(boxes):
+        return
+
+    if style == "box":
+        for (x1, y1, x2, y2), label in zip(boxes.tolist(), labels):
+            draw_box(img, x1, y1, x2, y2, label)
+        return
+
+    h, w = img.shape[:2]
+    boxes = boxes + np.array([-padding, -padding, padding, padding])
+    boxes = np.clip(boxes, 0, [w, h, w, h])
+    boxes = boxes[(boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])]
+
+    for x1, y1, x2, y2 in merge_boxes(boxes).tolist():
+        if style == "fill":
+            img[y1:y2, x1:x2] = FILL_COLOR
+        elif style == "blur":
+            img[y1:y2, x1:x2] = _blur(img[y1:y2, x1:x2])
+        elif style == "pixelate":
+            img[y1:y2, x1:x2] = _pixelate(img[y1:y2, x1:x2])
+        else:
+            raise ValueError(f"Unknown censor style '{style}', expected one of {list(CENSOR_STYLES)}")
+
+
+def _pixelate(roi: np.ndarray, cells: int = 3) -> np.ndarray:
+    roi_h, roi_w = roi.shape[:2]
+    side = min(roi_w, roi_h)
+    small_size: Tuple[int, int] = (max(int(cells * round(roi_w / side)), 1), max(int(cells * round(roi_h / side)), 1))
+    small = cv2.resize(roi, small_size, interpolation=cv2.INTER_LINEAR)
+    return cv2.resize(small, (roi_w, roi_h), interpolation=cv2.INTER_NEAREST)
+
+
+def _blur(roi: np.ndarray, downscale: int = 8) -> np.ndarray:
+    # Blurring a downscaled copy gives a strong blur at a fraction of the cost of a large kernel
+    roi_h, roi_w = roi.shape[:2]
+    small = cv2.resize(roi, (max(roi_w // downscale, 1), max(roi_h // downscale, 1)), interpolation=cv2.INTER_AREA)
+    small = cv2.GaussianBlur(small, (0, 0), sigmaX=max(min(small.shape[:2]) / 6, 1))
+    return cv2.resize(small, (roi_w, roi_h), interpolation=cv2.INTER_LINEAR)
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from typing import Any, Optional, Union
+
+import numpy as np
+from backend_config import (
+    DETECTION_CACHE_ENABLED,
+    DETECTION_CACHE_DIR,
+    DETECTION_CACHE_MEMORY_ITEMS,
+    DETECTION_CACHE_DISK_BYTES,
+)
+
+
+def content_hash(*parts: Union[bytes, str, np.ndarray]) -> str:
+    """
+    Hashes raw content: bytes, strings and arrays (shape and dtype included).
+
+    :return: Hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.shape}{part.dtype}".encode())
+            part = np.ascontiguousarray(part).data
+        elif isinstance(part, str):
+            part = part.encode()
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Hashes the content of a file without loading it into memory.
+
+    :param path: Path to the file.
+    :return: Hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """
+    Two-tier cache for JSON-serializable results.
+
+    The first tier is an in-process LRU dictionary, the second one stores every entry as a JSON file
+    on disk and evicts the least recently used files once their total size exceeds the budget.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str = DETECTION_CACHE_DIR,
+            memory_items: int = DETECTION_CACHE_MEMORY_ITEMS,
+            disk_bytes: int = DETECTION_CACHE_DISK_BYTES,
+            enabled: bool = DETECTION_CACHE_ENABLED,
+    ):
+        self.enabled = enabled
+        self.__cache_dir = os.path.abspath(cache_dir)
+        self.__memory_items = memory_items
+        self.__disk_bytes = disk_bytes
+        self.__memory: "OrderedDict[str, Any]" = OrderedDict()
+        self.__disk_size = None  # computed on first write
+        self.__lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        :param key: Cache key.
+        :return: Cached value, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        with self.__lock:
+            if key in self.__memory:
+                self.__memory.move_to_end(key)
+                return self.__memory[key]
+
+        path = self.__path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                value = json.load(file)
+            os.utime(path)  # mark as recently used for eviction
+        except (FileNotFoundError, ValueError):
+            return None
+
+        self.__remember(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a value in both tiers.
+
+        :param key: Cache key.
+        :param value: JSON-serializable value.
+        """
+        if not self.enabled:
+            return
+
+        self.__remember(key, value)
+        path = self.__path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(value, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self.__account(os.path.getsize(path))
+        except OSError as e:
+            print(f"Warning: could not write cache entry: {traceback.format_exc()}")
+
+    def __remember(self, key: str, value: Any) -> None:
+        with self.__lock:
+            self.__memory[key] = value
+            self.__memory.move_to_end(key)
+            while len(self.__memory) > self.__memory_items:
+                self.__memory.popitem(last=False)
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.__cache_dir, key[:2], f"{key}.json")
+
+    def __entries(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.__cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def __account(self, added_bytes: int) -> None:
+        with self.__lock:
+            if self.__disk_size is None:
+                self.__disk_size = sum(size for _, size, _ in self.__entries())
+            else:
+                self.__disk_size += added_bytes
+            if self.__disk_size <= self.__disk_bytes:
+                return
+
+            # Evict the least recently used entries down to 90% of the budget
+            entries = sorted(self.__entries())
+            self.__disk_size = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if self.__disk_size <= self.__disk_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                    self.__disk_size -= size
+                except FileNotFoundError:
+                    pass
+
+
+detection_cache = DetectionCache()
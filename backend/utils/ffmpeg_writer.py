@@ -0,0 +1,198 @@
+import functools
+import subprocess
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+from backend_config import VIDEO_ENCODER_PRESET, VIDEO_ENCODER_CRF
+from imageio_ffmpeg import get_ffmpeg_exe
+
+from .tracing import span
+
+STREAM_CHUNK_SIZE = 1024 * 1024  # bytes read from ffmpeg at once when the output is streamed
+
+
+class FFmpegVideoWriter:
+    """
+    Encodes raw BGR frames to H.264 with a single ffmpeg process.
+
+    Frames are piped to ffmpeg's stdin; when an audio source is given, its first audio
+    track is muxed into the output in the same pass, so the video is encoded only once.
+    With a `sink` the output is not written to disk: ffmpeg produces fragmented MP4 on its stdout,
+    which is handed to the sink (e.g. a streaming upload) while encoding goes on. If encoding fails
+    or is aborted, the sink's iterator raises instead of ending, so the sink never takes a truncated
+    video for a complete one.
+    """
+
+    def __init__(
+            self,
+            output_path: Optional[str],
+            width: int,
+            height: int,
+            fps: float,
+            audio_path: Optional[str] = None,
+            preset: str = VIDEO_ENCODER_PRESET,
+            crf: int = VIDEO_ENCODER_CRF,
+            sink: Optional[Callable[[Iterator[bytes]], Any]] = None,
+    ):
+        """
+        Starts the ffmpeg process.
+
+        :param output_path: Path of the output video, ignored if `sink` is given.
+        :param width, height: Frame size.
+        :param fps: FPS of the output video.
+        :param audio_path: Media file to take the audio track from (audio file or the source video).
+        :param preset: libx264 preset (ultrafast ... veryslow).
+        :param crf: libx264 constant rate factor, lower is better quality.
+        :param sink: Called in a background thread with an iterator over the encoded bytes;
+                     its return value is stored in `result` once the writer is closed.
+        """
+        self.output_path = output_path if sink is None else "pipe:1"
+        self.result = None
+        self.__frame_size = (height, width)
+
+        command = [
+            get_ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "pipe:0",
+        ]
+        if audio_path is not None:
+            command += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0?", "-c:a", "aac", "-shortest"]
+        command += [
+            "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",  # yuv420p needs even frame dimensions
+            "-pix_fmt", "yuv420p",
+        ]
+        if sink is None:
+            command += ["-movflags", "+faststart", output_path]
+        else:
+            # Fragmented MP4 never seeks back in the output, so it can be written to a pipe
+            command += ["-movflags", "frag_keyframe+empty_moov+default_base_moof", "-f", "mp4", "pipe:1"]
+        self.__process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE if sink is not None else None,
+        )
+        self.__closed = False
+        self.__aborted = False
+        self.__sink_error = None
+        self.__sink_thread = None
+        if sink is not None:
+            self.__sink_thread = threading.Thread(target=self.__run_sink, args=(sink,), daemon=True)
+            self.__sink_thread.start()
+
+    def __iter_output(self) -> Iterator[bytes]:
+        yield from iter(functools.partial(self.__process.stdout.read, STREAM_CHUNK_SIZE), b"")
+        # The end of stdout is only the end of the video if ffmpeg finished it
+        returncode = self.__process.wait()
+        if self.__aborted or returncode != 0:
+            raise RuntimeError(f"ffmpeg did not finish the video (exit code {returncode}), the output is incomplete")
+
+    def __run_sink(self, sink: Callable[[Iterator[bytes]], Any]) -> None:
+        read = functools.partial(self.__process.stdout.read, STREAM_CHUNK_SIZE)
+        try:
+            self.result = sink(self.__iter_output())
+        except Exception as e:
+            self.__sink_error = e
+        finally:
+            # Whatever the sink left unread is drained, so ffmpeg never blocks on a full pipe
+            for _ in iter(read, b""):
+                pass
+
+    def write(self, frame: np.ndarray) -> None:
+        """
+        Sends one frame to the encoder.
+
+        :param frame: BGR frame of the size given to the constructor.
+        """
+        if frame.shape[:2] != self.__frame_size:
+            raise ValueError(f"Frame size {frame.shape[:2]} does not match writer size {self.__frame_size}")
+        try:
+            with span("video.encode"):
+                self.__process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        except BrokenPipeError:
+            self.close()
+
+    def close(self) -> None:
+        """
+        Finishes encoding and waits for ffmpeg to exit.
+
+        :raises RuntimeError: If ffmpeg failed.
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        try:
+            self.__process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = self.__process.stderr.read().decode(errors="replace")
+        returncode = self.__process.wait()
+        if self.__sink_thread is not None:
+            self.__sink_thread.join()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {self.output_path}: {stderr}")
+        if self.__sink_error is not None:
+            raise RuntimeError(f"Failed to stream the encoded video: {self.__sink_error}") from self.__sink_error
+
+    def abort(self) -> None:
+        """
+        Stops encoding without finishing the video, e.g. because producing the frames failed.
+        A sink gets an error instead of the end of the stream; no error is raised here.
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__aborted = True
+        self.__process.kill()
+        try:
+            self.__process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.__process.stderr.read()
+        self.__process.wait()
+        if self.__sink_thread is not None:
+            self.__sink_thread.join()
+
+    def __enter__(self) -> "FFmpegVideoWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_video(
+        frames: Iterable[np.ndarray],
+        output_path: Optional[str],
+        fps: float,
+        audio_path: Optional[str] = None,
+        sink: Optional[Callable[[Iterator[bytes]], Any]] = None,
+) -> Any:
+    """
+    Encodes frames with `FFmpegVideoWriter` as they are produced.
+
+    :param frames: Iterable of BGR frames, may be lazy.
+    :param output_path: Path of the output video, ignored if `sink` is given.
+    :param fps: FPS of the output video.
+    :param audio_path: Media file whose audio track is added to the video.
+    :param sink: Consumer of the encoded bytes, see `FFmpegVideoWriter`.
+    :return: Result of the sink, None without one.
+    """
+    out = None
+    try:
+        for frame in frames:
+            if out is None:
+                height, width = frame.shape[:2]
+                out = FFmpegVideoWriter(output_path, width, height, fps, audio_path, sink=sink)
+            out.write(frame)
+    except BaseException:
+        # A partial video must not be finished, a streaming upload would store it as complete
+        if out is not None:
+            out.abort()
+        raise
+    if out is None:
+        return None
+    out.close()
+    return out.result
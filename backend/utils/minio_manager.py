@@ -1,11 +1,87 @@
+# This module is shared by the backend and the frontend: frontend/utils/minio_manager.py is a link
+# to it, so it may only import the MinIO SDK, its dependencies and python-dotenv
+import io
+import itertools
+import mimetypes
 import os
 import re
+import ssl
+import threading
+import traceback
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+from functools import lru_cache, wraps
+from typing import Callable, ContextManager, Iterable, Iterator, Optional
 
+import certifi
+import urllib3
 from dotenv import load_dotenv
 from minio import Minio
+from minio.datatypes import Part
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 
+# S3 requires at least 5 MiB for every part but the last one
+MINIO_PART_SIZE: int = int(os.getenv("MINIO_PART_SIZE", str(16 * 1024 * 1024)))
+MINIO_UPLOAD_WORKERS: int = int(os.getenv("MINIO_UPLOAD_WORKERS", "4"))
+MINIO_PRESIGNED_EXPIRY_S: int = 3600
+MINIO_POOL_SIZE: int = int(os.getenv("MINIO_POOL_SIZE", "32"))  # connections kept open per host
+MINIO_CONNECT_TIMEOUT_S: float = 5.0
+MINIO_READ_TIMEOUT_S: float = 300.0
+
+# Error codes of a missing object in stat_object
+_NOT_FOUND = ("NoSuchKey", "NoSuchObject", "NotFound", "ResourceNotFound")
+
+# Times a transfer stage, set by the application with `set_span`; transfers are not timed by default
+_span: Callable[[str], ContextManager] = lambda stage: nullcontext()
+
+
+def set_span(span: Callable[[str], ContextManager]) -> None:
+    """
+    Times the transfers with the given context manager factory, e.g. the backend's utils.span.
+
+    :param span: Called with a stage name such as "minio.upload", returns a context manager.
+    """
+    global _span
+    _span = span
+
+
+def traced(stage: str) -> Callable[[Callable], Callable]:
+    """
+    Wraps every call of the method in the span set with `set_span`.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def shared_http_pool(pool_size: int = MINIO_POOL_SIZE) -> urllib3.PoolManager:
+    """
+    One connection pool for all MinIO clients of the process.
+
+    The pool keeps enough connections for parallel part uploads and concurrent jobs, so requests
+    reuse open connections instead of doing a TCP (and TLS) handshake each.
+    """
+    return urllib3.PoolManager(
+        num_pools=4,
+        maxsize=pool_size,
+        block=True,  # wait for a free connection instead of opening throwaway ones
+        timeout=urllib3.Timeout(connect=MINIO_CONNECT_TIMEOUT_S, read=MINIO_READ_TIMEOUT_S),
+        cert_reqs=ssl.CERT_REQUIRED,
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+    )
+
 
 class MinIOClient:
     def __init__(self, endpoint, access_key, secret_key, secure=False):
@@ -14,28 +90,141 @@ class MinIOClient:
             endpoint,
             access_key=access_key,
             secret_key=secret_key,
-            secure=secure
+            secure=secure,
+            http_client=shared_http_pool(),
         )
+        self.__known_buckets = set()
+        self.__buckets_lock = threading.Lock()
 
+    def ensure_bucket(self, bucket_name: str) -> None:
+        """
+        Создает бакет, если его нет.
+
+        Buckets are never deleted by this client, so a bucket seen once is not checked again.
+        """
+        if bucket_name in self.__known_buckets:
+            return
+        with self.__buckets_lock:
+            if bucket_name in self.__known_buckets:
+                return
+            if not self.client.bucket_exists(bucket_name):
+                self.client.make_bucket(bucket_name)
+            self.__known_buckets.add(bucket_name)
+
+    @traced("minio.upload")
     def upload_file(self, bucket_name, file_path):
         """
         Загружает файл в MinIO с сохранением исходного имени.
         :param bucket_name: имя бакета
         :param file_path: путь к локальному файлу
         """
-        file_name = os.path.basename(file_path)
-        file_id = str(uuid.uuid4())
-        key = f"{file_id}_{file_name}"
+        def read_file() -> Iterator[bytes]:
+            with open(file_path, "rb") as file:
+                yield from iter(lambda: file.read(MINIO_PART_SIZE), b"")
+
+        return self.upload_stream(bucket_name, os.path.basename(file_path), read_file())
+
+    @traced("minio.upload_stream")
+    def upload_stream(
+            self,
+            bucket_name: str,
+            file_name: str,
+            chunks: Iterable[bytes],
+            part_size: int = MINIO_PART_SIZE,
+            workers: int = MINIO_UPLOAD_WORKERS,
+    ) -> Optional[str]:
+        """
+        Загружает поток байтов в MinIO под ключом "<uuid>_<file_name>".
+
+        Data is cut into parts of `part_size` as it arrives and the parts are uploaded in parallel
+        as one multipart upload, so the upload overlaps with whatever produces the data. At most
+        two parts per worker are kept in memory. Data smaller than one part is sent with a single PUT.
+
+        :param bucket_name: имя бакета
+        :param file_name: имя файла
+        :param chunks: данные кусками любого размера
+        :param part_size: размер части, не меньше 5 MiB
+        :param workers: число параллельно загружаемых частей
+        :return: ключ объекта или None при ошибке
+        """
+        key = f"{uuid.uuid4()}_{file_name}"
+        content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        parts = _iter_parts(chunks, part_size)
+        upload_id = None
         try:
-            if not self.client.bucket_exists(bucket_name):
-                self.client.make_bucket(bucket_name)
-            self.client.fput_object(bucket_name, key, file_path)
+            self.ensure_bucket(bucket_name)
+
+            first, second = next(parts, b""), next(parts, None)
+            if second is None:
+                self.client.put_object(bucket_name, key, io.BytesIO(first), len(first), content_type=content_type)
+            else:
+                # minio-py has no public API for parallel parts, so its multipart primitives are used directly
+                upload_id = self.client._create_multipart_upload(bucket_name, key, {"Content-Type": content_type})
+                etags, pending = [], deque()
+                with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+                    for number, data in enumerate(itertools.chain([first, second], parts), start=1):
+                        pending.append(executor.submit(
+                            self.client._upload_part, bucket_name, key, data, None, upload_id, number
+                        ))
+                        if len(pending) >= 2 * max(workers, 1):
+                            etags.append(pending.popleft().result())
+                    etags.extend(future.result() for future in pending)
+                self.client._complete_multipart_upload(
+                    bucket_name, key, upload_id, [Part(number, etag) for number, etag in enumerate(etags, start=1)]
+                )
             print(f"Файл {key} успешно загружен в бакет {bucket_name}")
             return key
-        except S3Error as err:
+        except Exception as err:
+            if upload_id is not None:
+                try:
+                    self.client._abort_multipart_upload(bucket_name, key, upload_id)
+                except Exception:
+                    # The original error matters more, the unfinished upload is reported and left behind
+                    print(f"Ошибка отмены загрузки {key}: {traceback.format_exc()}")
+            if not isinstance(err, S3Error):
+                raise
             print(f"Ошибка загрузки: {err}")
             return None
 
+    def presigned_url(self, bucket_name: str, object_name: str, expires_s: int = MINIO_PRESIGNED_EXPIRY_S) -> str:
+        """
+        Ссылка на объект, по которой его можно читать без ключей, в том числе с Range-запросами.
+
+        ffmpeg and OpenCV read such a URL directly, fetching only the ranges they decode.
+
+        :param bucket_name: имя бакета
+        :param object_name: имя объекта
+        :param expires_s: время жизни ссылки в секундах
+        :return: URL объекта
+        """
+        return self.client.presigned_get_object(bucket_name, object_name, expires=timedelta(seconds=expires_s))
+
+    def stream_object(
+            self,
+            bucket_name: str,
+            object_name: str,
+            offset: int = 0,
+            length: int = 0,
+            chunk_size: int = 1024 * 1024,
+    ) -> Iterator[bytes]:
+        """
+        Читает объект или его диапазон потоком, не сохраняя на диск.
+
+        :param bucket_name: имя бакета
+        :param object_name: имя объекта
+        :param offset: начало диапазона в байтах
+        :param length: длина диапазона, 0 - до конца объекта
+        :param chunk_size: размер отдаваемых кусков
+        :return: итератор по кускам данных
+        """
+        response = self.client.get_object(bucket_name, object_name, offset=offset, length=length)
+        try:
+            yield from response.stream(chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+
+    @traced("minio.download")
     def download_file(self, bucket_name, object_name, download_dir):
         """
         Скачивает файл из MinIO в указанную директорию, сохраняя имя объекта.
@@ -48,9 +237,7 @@ class MinIOClient:
             # Убедимся, что директория существует
             os.makedirs(download_dir, exist_ok=True)
 
-            base_name = os.path.basename(object_name)
-            match = re.match(r"^[0-9a-fA-F\-]{36}_(.+)", base_name)
-            clean_name = match.group(1) if match else base_name
+            clean_name = self.original_name(object_name)
 
             # Полный путь до файла (директория + имя файла из MinIO)
             download_path = os.path.join(download_dir, clean_name)
@@ -62,6 +249,16 @@ class MinIOClient:
             print(f"Ошибка скачивания: {err}")
             return None
 
+    @staticmethod
+    def original_name(object_name: str) -> str:
+        """
+        Имя файла без префикса "<uuid>_", добавленного при загрузке.
+        """
+        base_name = os.path.basename(object_name)
+        match = re.match(r"^[0-9a-fA-F\-]{36}_(.+)", base_name)
+        return match.group(1) if match else base_name
+
+    @traced("minio.delete")
     def delete_file(self, bucket_name, object_name):
         """
         Удаляет файл из MinIO.
@@ -74,37 +271,55 @@ class MinIOClient:
         except S3Error as err:
             print(f"Ошибка удаления: {err}")
 
+    @traced("minio.clear")
     def clear(self, bucket_name):
         """
         Удаляет все из MinIO.
+
+        Objects are deleted with batched DeleteObjects requests (up to 1000 keys each)
+        while the listing is still being read.
         :param bucket_name: имя бакета
         """
         try:
-            objects = self.client.list_objects(bucket_name)
-            for obj in objects:
-                self.client.remove_object(bucket_name, obj.object_name)
+            objects = self.client.list_objects(bucket_name, recursive=True)
+            errors = self.client.remove_objects(bucket_name, (DeleteObject(obj.object_name) for obj in objects))
+            for error in errors:
+                print(f"Ошибка удаления {error.name}: {error.message}")
             print(f"Бакет {bucket_name} успешно зачищен")
         except S3Error as err:
             print(f"Ошибка удаления: {err}")
 
+    @traced("minio.exists")
     def file_exists(self, bucket_name, object_name):
         """
-        Проверяет, существует ли файл в бакете.
+        Проверяет, существует ли файл в бакете, одним HEAD-запросом.
         :param bucket_name: имя бакета
         :param object_name: имя объекта
         :return: True, если файл существует, иначе False
         """
         try:
-            objects = self.client.list_objects(bucket_name)
-            for obj in objects:
-                if obj.object_name == object_name:
-                    return True
-            return False
+            self.client.stat_object(bucket_name, object_name)
+            return True
         except S3Error as err:
-            print(f"Ошибка проверки существования файла: {err}")
+            if err.code not in _NOT_FOUND:
+                print(f"Ошибка проверки существования файла: {err}")
             return False
 
 
+def _iter_parts(chunks: Iterable[bytes], part_size: int) -> Iterator[bytes]:
+    """
+    Regroups chunks of any size into parts of exactly `part_size` bytes, the last one may be shorter.
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
+
 load_dotenv(".env")
 minio_client = MinIOClient(
     endpoint=os.getenv("MINIO_ENDPOINT"),
@@ -1,8 +1,14 @@
+import contextvars
 import os
 import shutil
+from contextlib import contextmanager
+from typing import Iterator
 
 import traceback
 
+# Directory of the current scope (see TempFilesManager.scope), None outside of any scope
+_current_scope = contextvars.ContextVar("temp_files_scope", default=None)
+
 
 def singleton(cls):
     instances = {}
@@ -41,10 +47,14 @@ class TempFilesManager:
         """
         Creates a named temporary file in the temporary directory.
 
+        If called inside `scope`, the file is created in the scope directory.
+
         :param file_name: The name of the file.
         :return: The path to the temporary file.
         """
-        file_path = os.path.join(self.temp_dir, file_name)
+        directory = _current_scope.get() or self.temp_dir
+        os.makedirs(directory, exist_ok=True)
+        file_path = os.path.join(directory, file_name)
         open(file_path, 'w').close()
         self.temp_files.append(file_path)
         return file_path
@@ -64,6 +74,27 @@ class TempFilesManager:
         self.temp_dirs.append(dir_path)
         return dir_path
 
+    @contextmanager
+    def scope(self, name: str) -> Iterator[str]:
+        """
+        Isolates the temporary files of one job.
+
+        Inside the context, `create_temp_file` puts files into a dedicated subdirectory, which is
+        deleted on exit. Concurrent jobs therefore neither collide on file names nor delete each
+        other's files.
+
+        :param name: Unique name of the scope, e.g. a job id.
+        :return: The path to the scope directory.
+        """
+        scope_dir = os.path.join(self.temp_dir, name)
+        os.makedirs(scope_dir, exist_ok=True)
+        token = _current_scope.set(scope_dir)
+        try:
+            yield scope_dir
+        finally:
+            _current_scope.reset(token)
+            shutil.rmtree(scope_dir, ignore_errors=True)
+
     def cleanup(self) -> None:
         """
         Deletes all registered temporary files and directories.
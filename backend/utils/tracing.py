@@ -0,0 +1,134 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+STAGE_SECONDS = Histogram("censor_stage_seconds", "Time spent in a processing stage", ["stage"], buckets=_BUCKETS)
+INFERENCE_SECONDS = Histogram("censor_inference_seconds", "Time of one detector call", ["model"], buckets=_BUCKETS)
+FRAMES_PROCESSED = Counter("censor_frames_processed_total", "Video frames censored")
+JOBS = Counter("censor_jobs_total", "Finished jobs", ["status"])
+JOB_SECONDS = Histogram("censor_job_seconds", "Time from the start to the end of a job", buckets=_BUCKETS)
+QUEUE_DEPTH = Gauge("censor_queue_depth", "Jobs queued or running")
+
+# Timings of the current job (see collect_timings), None outside of any job
+_current_timings = contextvars.ContextVar("trace_timings", default=None)
+# Spans kept for the parent process (see record_spans), None if not recording
+_recorded_spans = contextvars.ContextVar("recorded_spans", default=None)
+
+# (stage, model, seconds) of a recorded span
+SpanRecord = Tuple[str, Optional[str], float]
+
+
+class Timings:
+    """
+    Total time and number of calls per stage, collected across the threads of one job.
+    """
+
+    def __init__(self):
+        self.__stages: Dict[str, list] = {}
+        self.__lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self.__lock:
+            total = self.__stages.setdefault(stage, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        :return: {stage: {"calls": ..., "seconds": ...}}, slowest stages first.
+        """
+        with self.__lock:
+            stages = sorted(self.__stages.items(), key=lambda item: -item[1][1])
+        return {stage: {"calls": calls, "seconds": round(seconds, 4)} for stage, (calls, seconds) in stages}
+
+
+def _record(stage: str, seconds: float, model: Optional[str] = None) -> None:
+    recorded = _recorded_spans.get()
+    if recorded is not None:
+        recorded.append((stage, model, seconds))
+    if model is None:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+    else:
+        INFERENCE_SECONDS.labels(model).observe(seconds)
+        stage = f"{stage}:{model}"
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def span(stage: str, model: Optional[str] = None) -> Iterator[None]:
+    """
+    Times a block and records it in the stage histogram and the timings of the current job.
+
+    :param stage: Stage name, e.g. "minio.download".
+    :param model: Detector name; the time then goes to the inference histogram of the model.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(stage, time.perf_counter() - start, model)
+
+
+def traced(stage: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator that wraps every call of the function in a `span`.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """
+    Collects the timings of all spans in this context, including threads started with a copy of it.
+
+    :return: Context manager yielding the collected timings.
+    """
+    timings = Timings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def record_spans() -> Iterator[List[SpanRecord]]:
+    """
+    Keeps every span of this context in a list as well.
+
+    Metrics and timings of a worker process stay in that process, so a worker runs its task
+    inside `record_spans` and returns the list; the parent passes it to `replay_spans`.
+
+    :return: Context manager yielding the list of recorded spans.
+    """
+    recorded = []
+    token = _recorded_spans.set(recorded)
+    try:
+        yield recorded
+    finally:
+        _recorded_spans.reset(token)
+
+
+def replay_spans(spans: Iterable[SpanRecord]) -> None:
+    """
+    Records spans of a worker process in the histograms and the timings of the current job.
+    """
+    for stage, model, seconds in spans:
+        _record(stage, seconds, model)
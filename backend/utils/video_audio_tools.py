@@ -1,85 +1,79 @@
-import contextlib
-import os
-import traceback
-import wave
+import subprocess
+from typing import Iterator
 
-from moviepy.editor import VideoFileClip, AudioFileClip
-from pydub import AudioSegment
+from imageio_ffmpeg import get_ffmpeg_exe
 
-from .temp_file_manager import TempFilesManager
+from .tracing import traced
 
 
-def audio_format_transcoder(audio_path: str) -> str:
+def has_audio_track(media_path: str) -> bool:
     """
-    Converts an audio file in WAV with a frequency of 16 kHz and mono.
+    Checks whether a media file (or URL) has at least one audio stream.
 
-    :param audio_path: the path to the original audio file.
-    :return: the path to a converted temporary file in WAV format.
-    :raises RuntimeError: if the conversion has failed.
+    :param media_path: the path to an audio or video file.
+    :return: True if ffmpeg reports an audio stream.
     """
+    # Without an output ffmpeg only prints the stream list and exits with an error, which is expected here
+    result = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-i", media_path], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    return any(
+        line.lstrip().startswith("Stream #") and "Audio:" in line
+        for line in result.stderr.decode(errors="replace").splitlines()
+    )
 
-    orig_name = os.path.splitext(os.path.basename(audio_path))[0]
-    output_path = TempFilesManager().create_temp_file(f"{orig_name}_vosk.wav")
 
-    try:
-        audio = AudioSegment.from_file(audio_path)
-        audio = audio.set_frame_rate(16000).set_channels(1)
-        audio.export(
-            output_path,
-            format="wav",
-            codec="pcm_s16le",
-            parameters=["-ar", "16000", "-ac", "1"]
-        )
-        with contextlib.closing(wave.open(output_path, 'r')) as wav:
-            if wav.getnchannels() != 1:
-                raise ValueError("The wrong number of channels")
-        return output_path
-
-    except Exception as e:
-        if os.path.exists(output_path):
-            os.remove(output_path)
-        raise RuntimeError(f"AudioConversionError: {traceback.format_exc()}")
-
-
-def extract_audio(video_path: str) -> str:
+def iter_pcm_chunks(media_path: str, sample_rate: int = 16000, chunk_size: int = 8000) -> Iterator[bytes]:
     """
-    Извлекает аудио из видео
-    возвращает путь к аудиофайлу.
-    """
-    orig_basename = os.path.splitext(os.path.basename(video_path))[0]
-    orig_audio_path = TempFilesManager().create_temp_file(f"{orig_basename}.wav")
-
-    with VideoFileClip(video_path) as video_clip:
-        video_clip.audio.write_audiofile(orig_audio_path, codec='pcm_s16le')
+    Decodes the first audio track of any media file to mono 16-bit PCM and yields it in chunks.
 
-    return orig_audio_path
+    The audio is streamed from ffmpeg's stdout, nothing is written to disk.
 
-
-def add_audio_to_video(audio_path: str, video_path: str, output_path: str) -> None:
+    :param media_path: the path to an audio or video file.
+    :param sample_rate: output sample rate in Hz.
+    :param chunk_size: chunk size in bytes (2 bytes per sample).
+    :return: iterator over raw s16le chunks.
+    :raises RuntimeError: if ffmpeg could not decode the file, e.g. it has no audio track (see `has_audio_track`).
     """
-    Добавляет или заменяет аудио в видеоролике и сохраняет результат в output_path.
-
-    :param audio_path: Путь к аудиофайлу (mp3, wav и т.п.)
-    :param video_path: Путь к исходному видеофайлу
-    :param output_path: Путь, по которому сохранить финальный файл с аудио
-    """
-
+    command = [
+        get_ffmpeg_exe(), "-loglevel", "error", "-i", media_path,
+        "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     try:
-        video = VideoFileClip(video_path)
-        audio = AudioFileClip(audio_path)
-
-        final_clip = video.set_audio(audio)
-
-        final_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            threads=4,
-            verbose=False
-        )
-
-        video.close()
-        audio.close()
+        while True:
+            data = process.stdout.read(chunk_size)
+            if not data:
+                break
+            yield data
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        stderr = process.stderr.read().decode(errors="replace")
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"AudioDecodingError: ffmpeg could not decode {media_path}: {stderr}")
+
+
+@traced("audio.mux")
+def mux_audio_video(video_path: str, audio_path: str, output_path: str) -> None:
+    """
+    Combines an encoded video with an audio track without re-encoding the video.
 
-    except Exception as e:
-        raise RuntimeError(f"Ошибка замены аудио: {traceback.format_exc()}")
+    :param video_path: Path to the encoded video (its audio, if any, is dropped).
+    :param audio_path: Path to the audio file (or any media file with an audio track).
+    :param output_path: Path of the resulting file.
+    :raises RuntimeError: if ffmpeg failed.
+    """
+    command = [
+        get_ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-i", video_path, "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0?", "-c:v", "copy", "-c:a", "aac", "-shortest",
+        output_path,
+    ]
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"Ошибка замены аудио: {result.stderr.decode(errors='replace')}")
@@ -0,0 +1 @@
+../../backend/utils/minio_manager.py
\ No newline at end of file